@@ -0,0 +1,52 @@
+import queue
+import logging
+import logging.handlers
+from typing import Optional, Union
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def setup_logging(path: str = "app.log", level: Union[str, int] = "INFO",
+                  max_bytes: int = 5 * 1024 * 1024, backup_count: int = 3,
+                  console: bool = True) -> logging.handlers.QueueListener:
+    """Route all logging through an in-memory queue. Callers on the capture,
+    hotkey and Tk threads format the record (QueueHandler.prepare merges the
+    message and any traceback) and enqueue it; a listener thread does the
+    (size-rotated) file and console writes. Records below the level are
+    dropped before that, so %-style debug calls on hot paths cost next to nothing."""
+    global _listener
+    stop_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.handlers.RotatingFileHandler(
+        path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )]
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    set_log_level(level)
+
+    _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def set_log_level(level: Union[str, int]):
+    """Change the level at runtime; records below it are dropped before any formatting"""
+    logging.getLogger().setLevel(level.upper() if isinstance(level, str) else level)
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
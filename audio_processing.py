@@ -0,0 +1,154 @@
+import re
+import numpy as np
+from typing import List, Optional, Tuple
+
+def pcm_to_samples(pcm: bytes) -> np.ndarray:
+    """View 16-bit PCM as an int16 array without copying"""
+    return np.frombuffer(pcm, dtype=np.int16)
+
+def rms_db(pcm: bytes) -> float:
+    """Loudness of a PCM chunk in dBFS"""
+    samples = pcm_to_samples(pcm).astype(np.float32)
+    if samples.size == 0:
+        return -120.0
+    rms = np.sqrt(np.mean(samples * samples)) / 32768.0
+    return float(20 * np.log10(max(rms, 1e-6)))
+
+def trim_silence(pcm: bytes, rate: int = 16000, threshold_db: float = -40.0,
+                 frame_seconds: float = 0.02, padding_seconds: float = 0.2,
+                 min_silence_seconds: float = 0.6,
+                 min_speech_seconds: float = 0.2) -> Tuple[bytes, float]:
+    """Energy-based voice activity detection over mono 16-bit PCM.
+
+    Leading and trailing silence is cut, and pauses longer than
+    min_silence_seconds are removed (keeping padding_seconds of context
+    around speech). Returns the trimmed PCM and the seconds removed; the
+    PCM is empty when the clip has less than min_speech_seconds of speech.
+    """
+    samples = pcm_to_samples(pcm)
+    total_seconds = len(samples) / rate
+    frame = max(1, int(rate * frame_seconds))
+    count = len(samples) // frame
+    if count == 0:
+        return b"", total_seconds
+
+    frames = samples[:count * frame].reshape(count, frame).astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1)) / 32768.0
+    speech = 20 * np.log10(np.maximum(rms, 1e-6)) >= threshold_db
+    if speech.sum() * frame_seconds < min_speech_seconds:
+        return b"", total_seconds
+
+    # Dilate speech frames by the padding on both sides
+    pad = int(padding_seconds / frame_seconds)
+    # "full" and a slice rather than "same", which returns the kernel's length for short clips
+    keep = np.convolve(speech, np.ones(2 * pad + 1), mode="full")[pad:pad + count] > 0
+
+    # Short pauses between speech stay in so phrasing is preserved
+    edges = np.diff(np.concatenate(([1], keep.astype(np.int8), [1])))
+    gap_starts = np.flatnonzero(edges == -1)
+    gap_ends = np.flatnonzero(edges == 1)
+    max_gap = int(min_silence_seconds / frame_seconds)
+    for start, end in zip(gap_starts, gap_ends):
+        if start > 0 and end < count and end - start <= max_gap:
+            keep[start:end] = True
+
+    mask = np.repeat(keep, frame)
+    if len(samples) > mask.size:
+        # The partial frame at the end follows the last full frame
+        mask = np.concatenate((mask, np.full(len(samples) - mask.size, keep[-1])))
+    trimmed = samples[mask]
+    return trimmed.tobytes(), (len(samples) - trimmed.size) / rate
+
+class SegmentSplitter:
+    """Decides where to cut a running recording into segments that can be
+    transcribed while capture continues.
+
+    Works in byte offsets into the recording's PCM buffer. A segment is cut
+    at the first pause once it is at least min_seconds long, or forcibly at
+    max_seconds, in which case the next segment starts overlap_seconds
+    earlier so no word is lost at the boundary.
+    """
+
+    def __init__(self, rate: int, sample_width: int = 2, channels: int = 1,
+                 min_seconds: float = 8.0, max_seconds: float = 20.0,
+                 overlap_seconds: float = 1.0, silence_seconds: float = 0.5,
+                 silence_db: float = -40.0):
+        frame_bytes = sample_width * channels
+        self.bytes_per_second = rate * frame_bytes
+        # Keep every cut on a sample boundary
+        align = lambda seconds: int(seconds * rate) * frame_bytes
+        self.min_bytes = align(min_seconds)
+        self.max_bytes = align(max_seconds)
+        self.overlap_bytes = align(overlap_seconds)
+        self.silence_seconds = silence_seconds
+        self.silence_db = silence_db
+        self.start = 0
+        self.count = 0
+        self.silent_run = 0.0
+        self.start_overlapped = False
+
+    def push(self, data: bytes) -> Optional[Tuple[int, int, bool]]:
+        """Account for one captured chunk. Returns (start, end, overlapped)
+        byte offsets when a segment is complete"""
+        self.count += len(data)
+        if rms_db(data) < self.silence_db:
+            self.silent_run += len(data) / self.bytes_per_second
+        else:
+            self.silent_run = 0.0
+
+        length = self.count - self.start
+        if length >= self.min_bytes and self.silent_run >= self.silence_seconds:
+            segment = (self.start, self.count, self.start_overlapped)
+            self.start = self.count
+            self.start_overlapped = False
+            return segment
+        if length >= self.max_bytes:
+            segment = (self.start, self.count, self.start_overlapped)
+            self.start = self.count - self.overlap_bytes
+            self.start_overlapped = self.overlap_bytes > 0
+            return segment
+        return None
+
+    def tail(self) -> Tuple[int, bool]:
+        """Start offset of the not yet handed-off audio"""
+        return self.start, self.start_overlapped
+
+def _normalize_words(words: List[str]) -> List[str]:
+    return [re.sub(r"[^\w']", "", w).lower() for w in words]
+
+def merge_overlap(previous: str, following: str, max_words: int = 12) -> str:
+    """Join two transcripts whose audio overlapped, dropping the words the
+    following segment repeats from the end of the previous one"""
+    prev_words = previous.split()
+    next_words = following.split()
+    if not prev_words:
+        return following.strip()
+    if not next_words:
+        return previous.strip()
+    prev_norm = _normalize_words(prev_words)
+    next_norm = _normalize_words(next_words)
+
+    # Longest run of trailing words of `previous` found near the start of `following`
+    best_cut = 0
+    for size in range(min(max_words, len(prev_norm), len(next_norm)), 0, -1):
+        tail = prev_norm[-size:]
+        for offset in range(0, min(max_words, len(next_norm) - size) + 1):
+            if next_norm[offset:offset + size] == tail:
+                best_cut = offset + size
+                break
+        if best_cut:
+            break
+    return " ".join(prev_words + next_words[best_cut:])
+
+def stitch_segments(segments: List[Tuple[str, bool]]) -> str:
+    """Stitch (text, overlapped_with_previous) segments into one transcript"""
+    text = ""
+    for segment_text, overlapped in segments:
+        segment_text = (segment_text or "").strip()
+        if not segment_text:
+            continue
+        if overlapped:
+            text = merge_overlap(text, segment_text)
+        else:
+            text = f"{text} {segment_text}".strip()
+    return text
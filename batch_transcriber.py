@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import wave
+import queue
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from whisper_cpp_wrapper import TranscriptionInterrupted, WhisperTranscriber
+from metrics import METRICS
+
+AUDIO_EXTENSIONS = (".wav",)
+
+def find_audio_files(paths: Iterable[str], extensions=AUDIO_EXTENSIONS) -> List[str]:
+    """Expand files and directories (recursively) into a sorted list of audio files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files += [os.path.join(root, name) for name in names if name.lower().endswith(extensions)]
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            logging.warning(f"Skipping {path}: not a file or directory")
+    return sorted(set(os.path.abspath(f) for f in files))
+
+def audio_duration(path: str) -> float:
+    try:
+        with wave.open(path, "rb") as wf:
+            return wf.getnframes() / wf.getframerate()
+    except Exception:
+        return 0.0
+
+def load_done(output_path: str) -> Set[str]:
+    """Files that already have a transcript in an earlier (possibly interrupted) run's output"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short when the previous run was killed
+                continue
+            if record.get("text") is not None:
+                done.add(record["file"])
+    return done
+
+def _end_partial_line(output_path: str):
+    # A run killed mid-write leaves half a line; start the next record on a fresh one
+    if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+        return
+    with open(output_path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+def split_threads(workers: int, cpu_count: Optional[int] = None) -> int:
+    """Whisper threads per worker so that all workers together use every core once"""
+    cpu_count = cpu_count or os.cpu_count() or 4
+    return max(1, cpu_count // max(1, workers))
+
+def transcribe_batch(paths: Iterable[str], output_path: str, workers: int = 0, resume: bool = True,
+                     transcriber_options: Optional[dict] = None,
+                     on_result: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """Transcribe every audio file under `paths` with `workers` parallel whisper
+    processes, appending one JSON line per file to output_path as each finishes.
+
+    With resume, files already transcribed in output_path are skipped (failed
+    ones are retried). workers=0 picks one worker per 4 cores. Returns a summary
+    with the audio-seconds per wall-second throughput.
+    """
+    files = find_audio_files(paths)
+    done = load_done(output_path) if resume else set()
+    pending = [f for f in files if f not in done]
+    if not resume and os.path.exists(output_path):
+        os.remove(output_path)
+    _end_partial_line(output_path)
+    workers = workers or max(1, (os.cpu_count() or 4) // 4)
+    workers = max(1, min(workers, len(pending) or 1))
+    threads = split_threads(workers)
+    logging.info("Batch: %d files, %d already done, %d workers x %d threads",
+                 len(files), len(files) - len(pending), workers, threads)
+
+    jobs = queue.Queue()
+    for path in pending:
+        jobs.put(path)
+    write_lock = threading.Lock()
+    summary = {"files": len(files), "skipped": len(files) - len(pending), "transcribed": 0,
+               "failed": 0, "audio_seconds": 0.0}
+
+    def work(transcriber):
+        try:
+            while True:
+                try:
+                    path = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                seconds = audio_duration(path)
+                start = time.perf_counter()
+                error = "transcription failed"
+                with METRICS.span("batch.file"):
+                    try:
+                        text = transcriber.transcribe(path)
+                    except TranscriptionInterrupted as e:
+                        # Past its deadline; left for a resumed run to retry
+                        text, error = None, str(e)
+                record = {
+                    "file": path,
+                    "audio_seconds": round(seconds, 3),
+                    "elapsed": round(time.perf_counter() - start, 3),
+                    "text": text
+                }
+                if text is None:
+                    record["error"] = error
+                with write_lock:
+                    # Appended and flushed per file, so an interrupted batch keeps its finished work
+                    with open(output_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    if text is None:
+                        summary["failed"] += 1
+                    else:
+                        summary["transcribed"] += 1
+                        summary["audio_seconds"] += seconds
+                    if on_result:
+                        on_result(record)
+        finally:
+            transcriber.close()
+
+    options = dict(transcriber_options or {}, threads=threads)
+    began = time.perf_counter()
+    pool = [
+        threading.Thread(target=work, args=(WhisperTranscriber(**options),), daemon=True,
+                         name=f"batch-{i}")
+        for i in range(workers if pending else 0)
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    wall = time.perf_counter() - began
+    summary["wall_seconds"] = round(wall, 3)
+    summary["audio_seconds"] = round(summary["audio_seconds"], 3)
+    summary["realtime_factor"] = round(summary["audio_seconds"] / wall, 2) if wall > 0 else 0.0
+    logging.info("Batch finished: %s", summary)
+    return summary
@@ -0,0 +1,107 @@
+"""Stand-in for whisper-cli / whisper-server with configurable delays.
+
+Accepts the same arguments the app passes to the real binaries, plus:
+
+    --fake-load-ms N       simulated model load time (default 300)
+    --fake-decode-ratio R  decode seconds per second of audio (default 0.1)
+    --fake-text TEXT       transcript to return (default describes the clip)
+
+Started with --port it behaves like whisper-server (model loaded once,
+POST /inference); otherwise like whisper-cli (-f FILE or -f - for stdin),
+printing the transcript a segment at a time as decoding progresses and,
+with -pp, progress percentages on stderr.
+"""
+import io
+import sys
+import json
+import time
+import wave
+import argparse
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--fake-load-ms", type=float, default=300)
+    parser.add_argument("--fake-decode-ratio", type=float, default=0.1)
+    parser.add_argument("--fake-text", default=None)
+    parser.add_argument("-f", dest="file")
+    parser.add_argument("-m", dest="model")
+    parser.add_argument("-pp", dest="print_progress", action="store_true")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--host", default="127.0.0.1")
+    args, _ = parser.parse_known_args(argv)
+    return args
+
+def audio_seconds(wav_data: bytes) -> float:
+    with wave.open(io.BytesIO(wav_data)) as wf:
+        return wf.getnframes() / wf.getframerate()
+
+def decode(args, wav_data: bytes):
+    seconds = audio_seconds(wav_data)
+    start = time.perf_counter()
+    time.sleep(seconds * args.fake_decode_ratio)
+    text = args.fake_text or f"fake transcript of {seconds:.2f} seconds of audio"
+    return text, (time.perf_counter() - start) * 1000
+
+def run_cli(args):
+    start = time.perf_counter()
+    time.sleep(args.fake_load_ms / 1000)
+    load_ms = (time.perf_counter() - start) * 1000
+    if args.file == "-":
+        wav_data = sys.stdin.buffer.read()
+    else:
+        with open(args.file, "rb") as f:
+            wav_data = f.read()
+    seconds = audio_seconds(wav_data)
+    text = args.fake_text or f"fake transcript of {seconds:.2f} seconds of audio"
+    # One segment per few words, each after its share of the decode time
+    words = text.split()
+    segments = [" ".join(words[i:i + 3]) for i in range(0, len(words), 3)] or [""]
+    for index, segment in enumerate(segments, 1):
+        time.sleep(seconds * args.fake_decode_ratio / len(segments))
+        if args.print_progress:
+            sys.stderr.write(f"whisper_print_progress_callback: progress = {100 * index // len(segments):3d}%\n")
+            sys.stderr.flush()
+        # Like whisper-cli -nt: segments run on without newlines, flushed one by one
+        sys.stdout.write(f" {segment}")
+        sys.stdout.flush()
+    sys.stdout.write("\n")
+    total_ms = (time.perf_counter() - start) * 1000
+    # Same format whisper.cpp prints on exit
+    sys.stderr.write(f"whisper_print_timings:     load time = {load_ms:8.2f} ms\n")
+    sys.stderr.write(f"whisper_print_timings:    total time = {total_ms:8.2f} ms\n")
+
+def run_server(args):
+    time.sleep(args.fake_load_ms / 1000)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.respond({"status": "ok"})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            # The WAV is the last multipart part; find it by its RIFF header
+            start = body.find(b"RIFF")
+            end = body.rfind(b"\r\n--")
+            text, _ = decode(args, body[start:end])
+            self.respond({"text": f" {text}\n"})
+
+        def respond(self, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    HTTPServer((args.host, args.port), Handler).serve_forever()
+
+if __name__ == "__main__":
+    arguments = parse_args(sys.argv[1:])
+    if arguments.port:
+        run_server(arguments)
+    else:
+        run_cli(arguments)
@@ -0,0 +1,230 @@
+"""Headless end-to-end latency benchmark for the stop-to-text pipeline.
+
+Feeds WAV files (or synthetic clips) through TranscriptionPipeline.save_and_transcribe
+and WhisperTranscriber, timing each stage separately, and writes the results
+as JSON so runs from different commits can be compared.
+
+    python benchmarks/run_benchmark.py --synthetic 5 15 30 --runs 5
+    python benchmarks/run_benchmark.py --wav clip.wav --executable path/to/whisper-cli.exe --model path/to/ggml-base.en.bin
+    python benchmarks/run_benchmark.py --compare old.json new.json
+
+By default a fake whisper (benchmarks/fake_whisper.py) with configurable
+model-load and decode delays stands in for the real binary.
+"""
+import os
+import sys
+import json
+import time
+import wave
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from capture_buffer import CaptureBuffer
+from history_store import HistoryStore
+from settings import DEFAULT_SETTINGS
+from transcription_pipeline import TranscriptionPipeline
+from whisper_cpp_wrapper import WhisperTranscriber
+
+FAKE_WHISPER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_whisper.py")
+STAGES = ["buffer", "vad", "wav_encode", "wav_write", "spawn", "model_load", "decode",
+          "readback", "history_save", "first_words", "draft", "total"]
+
+def synthetic_clip(seconds: float, rate: int = 16000) -> bytes:
+    """Bursts of tone separated by pauses, so VAD has something to trim"""
+    t = np.arange(int(seconds * rate)) / rate
+    tone = np.sin(2 * np.pi * 220 * t) * 6000
+    speaking = (t % 3.0) < 2.2
+    return (tone * speaking).astype(np.int16).tobytes()
+
+def read_wav(path: str) -> bytes:
+    with wave.open(path, "rb") as wf:
+        if wf.getframerate() != 16000 or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected 16 kHz mono 16-bit PCM")
+        return wf.readframes(wf.getnframes())
+
+def git_label() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+def summarize(results):
+    summary = {}
+    for stage in STAGES:
+        values = [r["stages"][stage] for r in results if stage in r["stages"]]
+        if values:
+            summary[stage] = {
+                "mean": float(np.mean(values)),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "max": float(max(values))
+            }
+    return summary
+
+def run(args):
+    workdir = tempfile.mkdtemp(prefix="whisper_bench_")
+    try:
+        if args.executable:
+            executable = args.executable
+            model = args.model
+        else:
+            fake = [sys.executable, FAKE_WHISPER,
+                    "--fake-load-ms", str(args.fake_load_ms),
+                    "--fake-decode-ratio", str(args.fake_decode_ratio)]
+            executable = fake
+            model = os.path.join(workdir, "fake-model.bin")
+            open(model, "wb").close()
+
+        transcriber = WhisperTranscriber(
+            model_path=model,
+            backend=args.backend,
+            executable=executable,
+            server_executable=args.server_executable or (executable if not args.executable else None),
+            threads=args.threads
+        )
+        transcriber.warm_up()
+        drafter = None
+        if args.draft:
+            if args.executable:
+                draft_executable, draft_model = executable, args.draft_model
+            else:
+                draft_executable = [sys.executable, FAKE_WHISPER,
+                                    "--fake-load-ms", str(args.fake_load_ms),
+                                    "--fake-decode-ratio", str(args.fake_draft_ratio)]
+                draft_model = model
+            drafter = WhisperTranscriber(
+                model_path=draft_model,
+                backend=args.backend,
+                executable=draft_executable,
+                server_executable=args.server_executable or (draft_executable if not args.executable else None),
+                threads=args.threads
+            )
+            drafter.warm_up()
+
+        settings = dict(DEFAULT_SETTINGS, incremental_transcription=False, vad_enabled=args.vad)
+        pipeline = TranscriptionPipeline(transcriber, settings, recordings_dir=workdir, drafter=drafter)
+        history = HistoryStore(os.path.join(workdir, "history.db"))
+
+        clips = [(os.path.basename(path), read_wav(path)) for path in args.wav]
+        clips += [(f"synthetic_{s:g}s", synthetic_clip(s)) for s in args.synthetic]
+
+        results = []
+        for name, pcm in clips:
+            buffer = CaptureBuffer(len(pcm))
+            buffer.write(pcm)
+            for run_index in range(args.runs):
+                timings = {}
+                start = time.perf_counter()
+
+                def on_partial(partial, fraction):
+                    # From the start of the pipeline until text could be shown (cli backend only)
+                    if partial and "first_words" not in timings:
+                        timings["first_words"] = time.perf_counter() - start
+
+                def on_draft(draft):
+                    timings["draft"] = time.perf_counter() - start
+
+                text = pipeline.save_and_transcribe(buffer, archive=args.archive, timings=timings,
+                                                    on_partial=on_partial, on_draft=on_draft)
+                history_start = time.perf_counter()
+                if text:
+                    history.add(text)
+                timings["history_save"] = time.perf_counter() - history_start
+                timings["total"] = time.perf_counter() - start
+                results.append({
+                    "clip": name,
+                    "audio_seconds": len(pcm) / 32000,
+                    "run": run_index,
+                    "ok": bool(text),
+                    "stages": {k: round(v, 6) for k, v in timings.items()}
+                })
+                print(f"{name} run {run_index}: {timings['total'] * 1000:.1f} ms "
+                      + " ".join(f"{k}={v * 1000:.1f}" for k, v in timings.items()
+                                 if k not in ("total", "first_words", "draft")))
+
+        history.close()
+        transcriber.close()
+        if drafter:
+            drafter.close()
+        report = {
+            "label": args.label or git_label(),
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "machine": {"node": platform.node(), "platform": platform.platform(), "cpus": os.cpu_count()},
+            "config": {
+                "backend": transcriber.backend,
+                "executable": "fake" if not args.executable else args.executable,
+                "fake_load_ms": args.fake_load_ms,
+                "fake_decode_ratio": args.fake_decode_ratio,
+                "vad": args.vad,
+                "archive": args.archive,
+                "draft": args.draft,
+                "runs": args.runs
+            },
+            "results": results,
+            "summary": summarize(results)
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def compare(old_path: str, new_path: str):
+    with open(old_path, "r", encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, "r", encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{'stage':<14}{old['label']:>14}{new['label']:>14}{'change':>10}   (p50, ms)")
+    for stage in STAGES:
+        if stage not in old["summary"] and stage not in new["summary"]:
+            continue
+        before = old["summary"].get(stage, {}).get("p50", 0.0) * 1000
+        after = new["summary"].get(stage, {}).get("p50", 0.0) * 1000
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"{stage:<14}{before:>14.2f}{after:>14.2f}{change:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stop-to-text latency")
+    parser.add_argument("--wav", nargs="*", default=[], help="16 kHz mono WAV files to feed through")
+    parser.add_argument("--synthetic", nargs="*", type=float, default=[],
+                        help="lengths in seconds of synthetic clips")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--backend", choices=["cli", "server"], default="cli")
+    parser.add_argument("--executable", help="real whisper-cli; the fake is used when omitted")
+    parser.add_argument("--server-executable", help="real whisper-server for --backend server")
+    parser.add_argument("--model", default="models/ggml-base.en.bin")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--fake-load-ms", type=float, default=300)
+    parser.add_argument("--fake-decode-ratio", type=float, default=0.1)
+    parser.add_argument("--vad", action="store_true", help="enable silence trimming")
+    parser.add_argument("--draft", action="store_true", help="two-pass: a fast draft before the full decode")
+    parser.add_argument("--draft-model", default="models/ggml-tiny.en.bin", help="draft model with --executable")
+    parser.add_argument("--fake-draft-ratio", type=float, default=0.02, help="decode ratio of the fake draft model")
+    parser.add_argument("--archive", action="store_true", help="also write WAV/transcript files")
+    parser.add_argument("--label", help="name for this run (defaults to the git commit)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if not args.wav and not args.synthetic:
+        args.synthetic = [5, 15, 30]
+    run(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import os
+import sys
+import mmap
+import logging
+import tempfile
+from typing import Optional
+
+class CaptureBuffer:
+    """Preallocated PCM buffer for one recording.
+
+    Chunks are copied straight into a bytearray allocated up front, and
+    readers get memoryview slices of it, so a recording costs one allocation
+    and no join. The buffer can be reused for a later recording once its
+    transcription job is done.
+    """
+
+    def __init__(self, capacity: int):
+        self.data = bytearray(capacity)
+        self.view = memoryview(self.data)
+        self.capacity = capacity
+        self.length = 0
+
+    def write(self, chunk) -> bool:
+        """Append a chunk; returns False once the buffer is full"""
+        count = min(len(chunk), self.capacity - self.length)
+        self.view[self.length:self.length + count] = memoryview(chunk)[:count]
+        self.length += count
+        return self.length < self.capacity
+
+    def getbuffer(self, start: int = 0, end: int = None) -> memoryview:
+        """Zero-copy view of the captured audio"""
+        return self.view[start:self.length if end is None else end]
+
+    def chunks(self, start: int = 0, end: int = None):
+        """The audio as consecutive views (a single one here; see SpillBuffer)"""
+        yield self.getbuffer(start, end)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def reset(self):
+        self.length = 0
+
+class PreRollBuffer:
+    """Ring buffer keeping the last few hundred milliseconds of input, so
+    speech that starts just before the hotkey is handled is not lost"""
+
+    def __init__(self, size: int):
+        self.data = bytearray(size)
+        self.view = memoryview(self.data)
+        self.size = size
+        self.pos = 0
+        self.filled = 0
+
+    def write(self, chunk):
+        if self.size == 0:
+            return
+        chunk = memoryview(chunk).cast("B")
+        if len(chunk) >= self.size:
+            self.view[:] = chunk[len(chunk) - self.size:]
+            self.pos = 0
+            self.filled = self.size
+            return
+        first = min(len(chunk), self.size - self.pos)
+        self.view[self.pos:self.pos + first] = chunk[:first]
+        self.view[:len(chunk) - first] = chunk[first:]
+        self.pos = (self.pos + len(chunk)) % self.size
+        self.filled = min(self.size, self.filled + len(chunk))
+
+    def drain_into(self, buffer: CaptureBuffer):
+        """Move the buffered audio, oldest first, into a capture buffer"""
+        if self.filled == self.size:
+            buffer.write(self.view[self.pos:])
+        buffer.write(self.view[:self.pos])
+        self.pos = 0
+        self.filled = 0
+
+class SpillBuffer:
+    """Capture buffer without a length limit for long recordings.
+
+    Audio goes into a temporary file mapped into memory in fixed-size
+    regions, so the OS can page out what has already been transcribed and
+    memory use stays flat however long the recording runs. Slices within a
+    region are zero-copy views; the rare slice across a region boundary is
+    copied.
+    """
+
+    # A multiple of mmap.ALLOCATIONGRANULARITY; about 8.7 minutes of 16 kHz mono audio
+    region_size = 16 * 1024 * 1024
+
+    def __init__(self, directory: Optional[str] = None):
+        self.file = tempfile.TemporaryFile(prefix="recording_", suffix=".pcm", dir=directory)
+        self.regions = []
+        self.length = 0
+
+    def _add_region(self):
+        offset = len(self.regions) * self.region_size
+        if sys.platform != "win32":
+            # Windows grows the file when the mapping is created; elsewhere it must exist first
+            os.ftruncate(self.file.fileno(), offset + self.region_size)
+        region = mmap.mmap(self.file.fileno(), self.region_size, offset=offset)
+        self.regions.append(region)
+
+    def write(self, chunk) -> bool:
+        """Append a chunk; never fills up"""
+        chunk = memoryview(chunk).cast("B")
+        while len(chunk):
+            index, offset = divmod(self.length, self.region_size)
+            if index == len(self.regions):
+                self._add_region()
+            count = min(len(chunk), self.region_size - offset)
+            self.regions[index][offset:offset + count] = chunk[:count]
+            self.length += count
+            chunk = chunk[count:]
+        return True
+
+    def getbuffer(self, start: int = 0, end: int = None) -> memoryview:
+        end = self.length if end is None else min(end, self.length)
+        if start >= end:
+            return memoryview(b"")
+        first, offset = divmod(start, self.region_size)
+        if end <= (first + 1) * self.region_size:
+            return memoryview(self.regions[first])[offset:offset + end - start]
+        return memoryview(b"".join(self.chunks(start, end)))
+
+    def chunks(self, start: int = 0, end: int = None):
+        """The audio from start to end as consecutive views, one per region"""
+        end = self.length if end is None else min(end, self.length)
+        while start < end:
+            index, offset = divmod(start, self.region_size)
+            count = min(end - start, self.region_size - offset)
+            yield memoryview(self.regions[index])[offset:offset + count]
+            start += count
+
+    def __len__(self) -> int:
+        return self.length
+
+    def reset(self):
+        self.length = 0
+
+    def close(self):
+        for region in self.regions:
+            try:
+                region.close()
+            except BufferError:
+                # A view is still alive, e.g. in the traceback of a cancelled transcription;
+                # the region is unmapped once that view is collected
+                logging.debug("Leaving a spill region with live views to be collected")
+        self.regions = []
+        self.file.close()
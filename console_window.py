@@ -0,0 +1,36 @@
+import sys
+
+# Windows API constants for console management
+SW_HIDE = 0
+SW_SHOW = 5
+
+_user32 = None
+_kernel32 = None
+
+def _console_window():
+    """Handle of the attached console, or None when there is none (or not on Windows)"""
+    global _user32, _kernel32
+    if sys.platform != "win32":
+        return None
+    if _kernel32 is None:
+        # Loaded on first use so importing the app never touches Win32
+        import ctypes
+        _kernel32 = ctypes.WinDLL('kernel32')
+        _user32 = ctypes.WinDLL('user32')
+    return _kernel32.GetConsoleWindow() or None
+
+def hide_console() -> bool:
+    """Hide the console window; False if there is none"""
+    console_window = _console_window()
+    if console_window:
+        _user32.ShowWindow(console_window, SW_HIDE)
+        return True
+    return False
+
+def show_console() -> bool:
+    """Show the console window; False if there is none"""
+    console_window = _console_window()
+    if console_window:
+        _user32.ShowWindow(console_window, SW_SHOW)
+        return True
+    return False
@@ -0,0 +1,164 @@
+import os
+import re
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+def parse_search(text: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Split a search box string into (fts query, since, until).
+
+    Plain words must all match, `word*` matches a prefix, "quoted words" match
+    a phrase, and from:/to: take a date or timestamp to filter on.
+    """
+    terms = []
+    since = until = None
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        if word.startswith("from:"):
+            since = word[5:] or None
+        elif word.startswith("to:"):
+            until = word[3:] or None
+            if until and len(until) == 10:
+                # A bare date includes the whole day
+                until += " 23:59:59"
+        elif phrase.strip():
+            terms.append('"' + phrase.replace('"', '""') + '"')
+        elif word:
+            prefix = word.endswith("*")
+            # e-mail, 3.5 and U.S. are several tokens to FTS5; quoted they match as a phrase
+            word = re.sub(r"[^\w']+", " ", word).strip()
+            if word:
+                terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return (" ".join(terms) or None), since, until
+
+class HistoryStore:
+    """Transcription history in SQLite (WAL mode).
+
+    Adding an entry is a single-row insert and reading never writes, so
+    neither grows with the size of the history.
+    """
+
+    def __init__(self, path: str = os.path.join("recordings", "history.db")):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transcriptions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS transcriptions_timestamp ON transcriptions(timestamp);
+        """)
+        has_index = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'transcriptions_fts'"
+        ).fetchone()
+        # Full-text index kept in step with the table by triggers
+        self.conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS transcriptions_fts USING fts5(
+                text, content='transcriptions', content_rowid='id'
+            );
+            CREATE TRIGGER IF NOT EXISTS transcriptions_ai AFTER INSERT ON transcriptions BEGIN
+                INSERT INTO transcriptions_fts(rowid, text) VALUES (new.id, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS transcriptions_ad AFTER DELETE ON transcriptions BEGIN
+                INSERT INTO transcriptions_fts(transcriptions_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS transcriptions_au AFTER UPDATE ON transcriptions BEGIN
+                INSERT INTO transcriptions_fts(transcriptions_fts, rowid, text) VALUES ('delete', old.id, old.text);
+                INSERT INTO transcriptions_fts(rowid, text) VALUES (new.id, new.text);
+            END;
+        """)
+        if not has_index:
+            # History created before search existed
+            self.conn.execute("INSERT INTO transcriptions_fts(transcriptions_fts) VALUES ('rebuild')")
+        self.conn.commit()
+
+    def add(self, text: str, timestamp: Optional[str] = None) -> int:
+        if timestamp is None:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT INTO transcriptions (timestamp, text) VALUES (?, ?)",
+                (timestamp, text)
+            )
+            self.conn.commit()
+            return cursor.lastrowid
+
+    def update(self, entry_id: int, text: str):
+        with self.lock:
+            self.conn.execute("UPDATE transcriptions SET text = ? WHERE id = ?", (text, entry_id))
+            self.conn.commit()
+
+    def _filtered(self, columns: str, query: Optional[str], since: Optional[str],
+                  until: Optional[str]) -> Tuple[str, list]:
+        if query and not since and not until and columns == "COUNT(*)":
+            # Counting plain matches needs nothing from the table itself
+            return "SELECT COUNT(*) FROM transcriptions_fts WHERE transcriptions_fts MATCH ?", [query]
+        if query:
+            sql = (f"SELECT {columns} FROM transcriptions_fts f "
+                   "JOIN transcriptions t ON t.id = f.rowid WHERE transcriptions_fts MATCH ?")
+            params = [query]
+        else:
+            sql = f"SELECT {columns} FROM transcriptions t WHERE 1"
+            params = []
+        if since:
+            sql += " AND t.timestamp >= ?"
+            params.append(since)
+        if until:
+            sql += " AND t.timestamp <= ?"
+            params.append(until)
+        return sql, params
+
+    def count(self, query: Optional[str] = None, since: Optional[str] = None,
+              until: Optional[str] = None) -> int:
+        sql, params = self._filtered("COUNT(*)", query, since, until)
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()[0]
+
+    def recent(self, limit: int = 50, offset: int = 0, query: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None) -> List[Dict]:
+        """Entries newest first, optionally restricted to an FTS query
+        (see parse_search) and a timestamp range"""
+        sql, params = self._filtered("t.id, t.timestamp, t.text", query, since, until)
+        # Ordering on the FTS rowid lets the index walk newest first and stop at the limit
+        sql += (" ORDER BY f.rowid DESC" if query else " ORDER BY t.id DESC") + " LIMIT ? OFFSET ?"
+        with self.lock:
+            rows = self.conn.execute(sql, params + [limit, offset]).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest(self) -> Optional[Dict]:
+        entries = self.recent(1)
+        return entries[0] if entries else None
+
+    def import_legacy(self, history_file: str) -> int:
+        """Import a timestamp|text history.txt in one transaction and rename it
+        so it is not imported twice. Returns the number of entries imported."""
+        entries = []
+        with open(history_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if "|" not in line:
+                    # The old format split multi-line transcripts across lines
+                    if entries and line:
+                        entries[-1] = (entries[-1][0], entries[-1][1] + "\n" + line)
+                    continue
+                timestamp, text = line.split("|", 1)
+                entries.append((timestamp, text))
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO transcriptions (timestamp, text) VALUES (?, ?)",
+                    entries
+                )
+        os.replace(history_file, history_file + ".imported")
+        logging.info(f"Imported {len(entries)} entries from {history_file}")
+        return len(entries)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
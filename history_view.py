@@ -0,0 +1,175 @@
+import customtkinter as ctk
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+def _clip(text: str, limit: int = 240) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+class HistoryRow(ctk.CTkFrame):
+    """One reusable history row; rebound to a different entry as the view scrolls"""
+
+    def __init__(self, master, height: int, on_copy: Callable[[str], None]):
+        super().__init__(master, fg_color="#2a2a2a", corner_radius=10, height=height)
+        self.pack_propagate(False)
+        self.entry = None
+        self.on_copy = on_copy
+
+        header = ctk.CTkFrame(self, fg_color="transparent")
+        header.pack(fill="x", padx=15, pady=(8, 0))
+
+        self.time_label = ctk.CTkLabel(
+            header,
+            text="",
+            font=("Segoe UI", 10),
+            text_color="#666666"
+        )
+        self.time_label.pack(side="left")
+
+        self.copy_button = ctk.CTkButton(
+            header,
+            text="Copy",
+            width=80,
+            height=24,
+            corner_radius=12,
+            font=("Segoe UI", 11),
+            fg_color="#333333",
+            hover_color="#444444",
+            command=self.copy
+        )
+        self.copy_button.pack(side="right")
+
+        self.text_label = ctk.CTkLabel(
+            self,
+            text="",
+            font=("Segoe UI", 12),
+            text_color="#ffffff",
+            wraplength=620,
+            justify="left",
+            anchor="nw"
+        )
+        self.text_label.pack(fill="both", expand=True, padx=15, pady=(2, 8))
+
+    def show(self, entry: Dict):
+        if self.entry is not None and self.entry == entry:
+            return
+        self.entry = entry
+        self.time_label.configure(text=entry["timestamp"])
+        self.text_label.configure(text=_clip(entry["text"]))
+
+    def copy(self):
+        if self.entry:
+            self.on_copy(self.entry["text"])
+
+class HistoryView(ctk.CTkFrame):
+    """Virtualized history list, newest first.
+
+    Only as many rows as fit on screen exist; scrolling rebinds them to other
+    entries. Entries are fetched from the store a page at a time when they
+    scroll into view and a bounded number of pages is cached.
+    """
+
+    row_height = 92
+    row_gap = 8
+    page_size = 50
+    max_cached_pages = 20
+
+    def __init__(self, master, store, on_copy: Callable[[str], None], **kwargs):
+        super().__init__(master, **kwargs)
+        self.store = store
+        self.on_copy = on_copy
+        self.pages = OrderedDict()
+        self.total = 0
+        self.first = 0
+        self.visible = 0
+        self.rows = []
+        self.filters = {}
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y", padx=(0, 5), pady=10)
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.pack(side="left", fill="both", expand=True, padx=(10, 5), pady=5)
+        self.body.bind("<Configure>", self.on_resize)
+
+        # Only capture the wheel while the pointer is over the list
+        self.bind("<Enter>", self.bind_wheel)
+        self.bind("<Leave>", self.unbind_wheel)
+
+    def fetch(self, index: int) -> Optional[Dict]:
+        page = index // self.page_size
+        if page in self.pages:
+            self.pages.move_to_end(page)
+        else:
+            self.pages[page] = self.store.recent(self.page_size, page * self.page_size, **self.filters)
+            if len(self.pages) > self.max_cached_pages:
+                self.pages.popitem(last=False)
+        entries = self.pages[page]
+        offset = index % self.page_size
+        return entries[offset] if offset < len(entries) else None
+
+    def refresh(self):
+        """Reload after the store changed; only the visible rows are redrawn"""
+        self.total = self.store.count(**self.filters)
+        self.pages.clear()
+        self.render()
+
+    def set_filter(self, query=None, since=None, until=None):
+        """Show only entries matching a search (see history_store.parse_search)"""
+        self.filters = {key: value for key, value in
+                        (("query", query), ("since", since), ("until", until)) if value}
+        self.first = 0
+        self.refresh()
+
+    def on_resize(self, event):
+        self.visible = max(1, event.height // (self.row_height + self.row_gap))
+        while len(self.rows) < self.visible:
+            self.rows.append(HistoryRow(self.body, self.row_height, self.on_copy))
+        self.render()
+
+    def render(self):
+        self.first = max(0, min(self.first, self.total - self.visible))
+        for i, row in enumerate(self.rows):
+            entry = self.fetch(self.first + i) if i < self.visible and self.first + i < self.total else None
+            if entry:
+                row.show(entry)
+                if not row.winfo_manager():
+                    row.pack(fill="x", pady=(self.row_gap // 2, self.row_gap // 2))
+            elif row.winfo_manager():
+                row.pack_forget()
+        if self.total > self.visible:
+            self.scrollbar.set(self.first / self.total, (self.first + self.visible) / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_to(self, first: int):
+        first = max(0, min(first, self.total - self.visible))
+        if first != self.first:
+            self.first = first
+            self.render()
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(value) * self.total))
+        elif action == "scroll":
+            step = self.visible if unit == "pages" else 1
+            self.scroll_to(self.first + int(value) * step)
+
+    def on_mousewheel(self, event):
+        if getattr(event, "num", None) == 4 or event.delta > 0:
+            self.scroll_to(self.first - 1)
+        else:
+            self.scroll_to(self.first + 1)
+
+    def bind_wheel(self, event=None):
+        self.bind_all("<MouseWheel>", self.on_mousewheel)
+        self.bind_all("<Button-4>", self.on_mousewheel)
+        self.bind_all("<Button-5>", self.on_mousewheel)
+
+    def unbind_wheel(self, event=None):
+        # Tk also sends <Leave> when the pointer moves onto one of our own rows
+        widget = self.winfo_containing(*self.winfo_pointerxy())
+        if widget is not None and str(widget).startswith(str(self)):
+            return
+        self.unbind_all("<MouseWheel>")
+        self.unbind_all("<Button-4>")
+        self.unbind_all("<Button-5>")
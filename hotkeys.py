@@ -0,0 +1,107 @@
+import time
+import queue
+import logging
+from typing import Callable, NamedTuple, Optional
+from metrics import METRICS
+
+class HotkeyEvent(NamedTuple):
+    action: str     # "toggle", "start", "stop" or "cancel"
+    at: float       # perf_counter() when the hook saw the key
+
+class HotkeyDispatcher:
+    """Global hotkeys whose hook callbacks only post a timestamped HotkeyEvent.
+
+    The keyboard library runs callbacks on its hook thread, and a slow
+    callback stalls every key press system-wide, so nothing here touches
+    Tk, audio or the engine: events go to `post` (by default a SimpleQueue,
+    which never blocks the poster) and the front end drains them on its own
+    thread with drain() or its own loop.
+
+    mode "toggle": the record hotkey starts and stops a recording.
+    mode "hold": push-to-talk, recording while the hotkey is held down.
+    """
+
+    def __init__(self, record_hotkey: str = "ctrl+shift+c", mode: str = "toggle",
+                 cancel_hotkey: Optional[str] = None,
+                 post: Optional[Callable[[HotkeyEvent], None]] = None):
+        if mode not in ("toggle", "hold"):
+            raise ValueError(f"Unknown hotkey mode: {mode}")
+        self.record_hotkey = record_hotkey
+        self.mode = mode
+        self.cancel_hotkey = cancel_hotkey
+        self.events = queue.SimpleQueue()
+        self.post = post or self.events.put
+        # Key auto-repeat fires the press callback again while a key is held
+        self.held = False
+        self.handles = []
+
+    def register(self):
+        import keyboard
+        self.unregister()
+        if self.mode == "hold":
+            self.handles.append(keyboard.add_hotkey(self.record_hotkey, self._pressed, suppress=True))
+            self.handles.append(keyboard.add_hotkey(self.record_hotkey, self._released, suppress=True,
+                                                    trigger_on_release=True))
+        else:
+            self.handles.append(keyboard.add_hotkey(
+                self.record_hotkey, lambda: self._post("toggle"), suppress=True
+            ))
+        if self.cancel_hotkey:
+            self.handles.append(keyboard.add_hotkey(
+                self.cancel_hotkey, lambda: self._post("cancel"), suppress=True
+            ))
+        logging.info("Hotkeys registered: %s (%s), cancel %s",
+                     self.record_hotkey, self.mode, self.cancel_hotkey or "none")
+
+    def unregister(self):
+        if not self.handles:
+            return
+        import keyboard
+        for handle in self.handles:
+            try:
+                keyboard.remove_hotkey(handle)
+            except (KeyError, ValueError):
+                pass
+        self.handles = []
+
+    def _post(self, action: str):
+        self.post(HotkeyEvent(action, time.perf_counter()))
+
+    def _pressed(self):
+        if not self.held:
+            self.held = True
+            self._post("start")
+
+    def _released(self):
+        if self.held:
+            self.held = False
+            self._post("stop")
+
+    def drain(self, handler: Callable[[HotkeyEvent], None]) -> int:
+        """Hand every queued event to handler on the calling thread; returns how many"""
+        count = 0
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return count
+            count += 1
+            handler(event)
+
+def hotkey_label(hotkey: str) -> str:
+    """ctrl+shift+c -> Ctrl+Shift+C"""
+    return "+".join(part.strip().capitalize() for part in hotkey.split("+"))
+
+def handle_hotkey(engine, event: HotkeyEvent, on_cancel: Optional[Callable[[int], None]] = None):
+    """Apply a hotkey event to a RecorderEngine, on the thread that owns it"""
+    METRICS.record("hotkey.dispatch", time.perf_counter() - event.at)
+    if event.action == "toggle":
+        engine.toggle_recording(event.at)
+    elif event.action == "start":
+        engine.start_recording(event.at)
+    elif event.action == "stop":
+        engine.stop_recording()
+    elif event.action == "cancel":
+        count = engine.cancel_transcriptions()
+        if on_cancel:
+            on_cancel(count)
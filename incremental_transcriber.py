@@ -0,0 +1,102 @@
+import queue
+import threading
+import logging
+from typing import Callable, Optional
+from audio_processing import stitch_segments
+from metrics import METRICS
+from whisper_cpp_wrapper import TranscriptionInterrupted
+
+class IncrementalTranscription:
+    """Transcribes finished segments of a recording in the background while
+    capture continues, so only the tail is left to decode on stop. With more
+    than one worker, segments are decoded in parallel; results are stitched
+    in capture order regardless."""
+
+    # Tails shorter than this are left out; whisper tends to hallucinate on them
+    min_tail_seconds = 0.3
+
+    def __init__(self, transcriber, rate: int = 16000, channels: int = 1, sample_width: int = 2,
+                 preprocess: Optional[Callable[[bytes], bytes]] = None, workers: int = 1,
+                 cancel_event: Optional[threading.Event] = None):
+        self.transcriber = transcriber
+        self.preprocess = preprocess
+        # Kills the segment decodes as well as the tail when the recording's job is cancelled
+        self.cancel_event = cancel_event
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.results = []
+        self.jobs = queue.Queue()
+        self.workers = [threading.Thread(target=self._work, daemon=True) for _ in range(max(1, workers))]
+        for worker in self.workers:
+            worker.start()
+
+    def _transcribe(self, pcm: bytes, on_partial=None) -> str:
+        if self.preprocess:
+            pcm = self.preprocess(pcm)
+            if not pcm:
+                return ""
+        text = self.transcriber.transcribe_pcm(
+            pcm,
+            rate=self.rate,
+            channels=self.channels,
+            sample_width=self.sample_width,
+            on_partial=on_partial,
+            cancel=self.cancel_event
+        )
+        return text or ""
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            index, pcm, overlapped = job
+            try:
+                seconds = len(pcm) / (self.rate * self.channels * self.sample_width)
+                logging.debug("Transcribing segment %d (%.1fs) while recording", index, seconds)
+                with METRICS.span("incremental.segment"):
+                    self.results[index] = (self._transcribe(pcm), overlapped)
+            except TranscriptionInterrupted as e:
+                # The segment is left empty; a cancel is raised again by finish()
+                logging.warning("Segment %d: %s", index, str(e))
+            except Exception as e:
+                logging.error(f"Error transcribing segment {index}: {str(e)}", exc_info=True)
+
+    def submit(self, pcm: bytes, overlapped: bool = False):
+        """Queue a completed segment for transcription"""
+        self.results.append(("", overlapped))
+        self.jobs.put((len(self.results) - 1, pcm, overlapped))
+
+    def finish(self, tail: Optional[bytes] = None, tail_overlapped: bool = False,
+               on_partial: Optional[Callable[[str, float], None]] = None) -> str:
+        """Decode the remaining tail and stitch it onto the finished segments.
+        on_partial sees the tail text as it is decoded, after the segments
+        finished so far"""
+        self.cancel()
+        tail_text = ""
+        if tail and len(tail) >= self.min_tail_seconds * self.rate * self.channels * self.sample_width:
+            partial = None
+            if on_partial:
+                partial = lambda text, fraction: on_partial(
+                    stitch_segments(self.results + [(text, tail_overlapped)]), fraction
+                )
+            tail_text = self._transcribe(tail, partial)
+        for worker in self.workers:
+            worker.join()
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise TranscriptionInterrupted("cancelled", "Transcription cancelled")
+        segments = self.results + [(tail_text, tail_overlapped)]
+        logging.debug("Stitching %d segments", len(segments))
+        return stitch_segments(segments)
+
+    def cancel(self):
+        for _ in self.workers:
+            self.jobs.put(None)
+
+    def discard(self):
+        """Stop without decoding a tail, waiting for the segment decodes in
+        flight (which cancel_event kills) so the audio can be released"""
+        self.cancel()
+        for worker in self.workers:
+            worker.join()
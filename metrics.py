@@ -0,0 +1,116 @@
+import os
+import json
+import time
+import threading
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+class Metrics:
+    """Rolling latency statistics per named span, plus event counters,
+    exportable as JSON or as a Prometheus textfile-collector file"""
+
+    def __init__(self, window: int = 2000):
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.sums = {}
+        self.events = {}
+        self.lock = threading.Lock()
+
+    def record(self, name: str, seconds: float):
+        with self.lock:
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.window)
+                self.counts[name] = 0
+                self.sums[name] = 0.0
+            self.samples[name].append(seconds)
+            self.counts[name] += 1
+            self.sums[name] += seconds
+
+    def increment(self, name: str, amount: int = 1):
+        with self.lock:
+            self.events[name] = self.events.get(name, 0) + amount
+
+    def counters(self) -> Dict[str, int]:
+        with self.lock:
+            return dict(self.events)
+
+    def record_all(self, prefix: str, timings: Dict[str, float]):
+        for stage, seconds in timings.items():
+            self.record(f"{prefix}.{stage}", seconds)
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self.lock:
+            samples = {name: sorted(values) for name, values in self.samples.items()}
+            counts = dict(self.counts)
+            sums = dict(self.sums)
+        stats = {}
+        for name, values in samples.items():
+            if not values:
+                continue
+            pick = lambda q: values[min(len(values) - 1, int(q * len(values)))]
+            stats[name] = {
+                "count": counts[name],
+                "sum": sums[name],
+                "p50": pick(0.50),
+                "p95": pick(0.95),
+                "p99": pick(0.99),
+                "max": values[-1]
+            }
+        return stats
+
+    def export_json(self, path: str):
+        payload = {
+            "updated": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "spans": self.snapshot(),
+            "counters": self.counters()
+        }
+        _write_atomic(path, json.dumps(payload, indent=2))
+
+    def export_prometheus(self, path: str):
+        lines = [
+            "# HELP whisper_recorder_span_seconds Duration of pipeline steps (rolling window quantiles)",
+            "# TYPE whisper_recorder_span_seconds summary"
+        ]
+        for name, stats in sorted(self.snapshot().items()):
+            for quantile in ("p50", "p95", "p99"):
+                q = int(quantile[1:]) / 100
+                lines.append(f'whisper_recorder_span_seconds{{span="{name}",quantile="{q}"}} {stats[quantile]:.6f}')
+            lines.append(f'whisper_recorder_span_seconds_sum{{span="{name}"}} {stats["sum"]:.6f}')
+            lines.append(f'whisper_recorder_span_seconds_count{{span="{name}"}} {stats["count"]}')
+        lines += [
+            "# HELP whisper_recorder_events_total Count of notable events (cache hits, missed deadlines, ...)",
+            "# TYPE whisper_recorder_events_total counter"
+        ]
+        for name, count in sorted(self.counters().items()):
+            lines.append(f'whisper_recorder_events_total{{event="{name}"}} {count}')
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+    def export(self, json_path: Optional[str] = None, prometheus_path: Optional[str] = None):
+        try:
+            if json_path:
+                self.export_json(json_path)
+            if prometheus_path:
+                self.export_prometheus(prometheus_path)
+        except Exception as e:
+            logging.error(f"Error exporting metrics: {str(e)}")
+
+def _write_atomic(path: str, content: str):
+    # Scrapers must never see a half-written file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+# Process-wide registry
+METRICS = Metrics()
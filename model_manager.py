@@ -0,0 +1,379 @@
+import os
+import re
+import json
+import time
+import wave
+import logging
+import threading
+from collections import Counter, deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from whisper_cpp_wrapper import WhisperTranscriber
+from whisper_tuning import machine_key
+from metrics import METRICS
+
+PROFILE_FILE = "model_profiles.json"
+
+# ggml-base.en.bin, ggml-tiny.en-q5_1.bin, ggml-large-v3-turbo-q8_0.bin, ...
+_MODEL_FILE = re.compile(r"^ggml-(?P<family>[a-z0-9-]+?)(?P<english>\.en)?(?:-(?P<quant>q\d_(?:\d|k)))?\.bin$")
+FAMILY_RANK = {"tiny": 0, "base": 1, "small": 2, "medium": 3, "large": 4}
+# Accuracy given up by quantizing, by bits per weight
+QUANT_PENALTY = {"8": 0.1, "6": 0.2, "5": 0.25, "4": 0.35, "3": 0.5, "2": 0.6}
+
+class ModelInfo(NamedTuple):
+    name: str                   # file name without "ggml-" and ".bin", e.g. "base.en-q5_1"
+    path: str
+    family: str                 # tiny, base, small, medium, large-v3, large-v3-turbo, ...
+    english: bool
+    quantization: Optional[str]
+    size: int
+
+    def quality(self) -> float:
+        """Expected accuracy rank for English dictation; higher is better"""
+        rank = FAMILY_RANK.get(self.family.split("-")[0], 0)
+        if self.english:
+            rank += 0.05
+        if self.quantization:
+            rank -= QUANT_PENALTY.get(self.quantization[1], 0.3)
+        return rank
+
+def parse_model(path: str) -> Optional[ModelInfo]:
+    match = _MODEL_FILE.match(os.path.basename(path))
+    if not match:
+        return None
+    return ModelInfo(
+        name=os.path.basename(path)[len("ggml-"):-len(".bin")],
+        path=path,
+        family=match.group("family"),
+        english=bool(match.group("english")),
+        quantization=match.group("quant"),
+        size=os.path.getsize(path)
+    )
+
+def discover_models(models_dir: str) -> List[ModelInfo]:
+    """Every ggml model (full precision or quantized) in models_dir, smallest first"""
+    models = []
+    if not os.path.isdir(models_dir):
+        return models
+    for name in os.listdir(models_dir):
+        model = parse_model(os.path.abspath(os.path.join(models_dir, name)))
+        if model:
+            models.append(model)
+        elif name.endswith(".bin"):
+            logging.debug("Skipping %s: not a ggml model name", name)
+    return sorted(models, key=lambda m: m.size)
+
+class ModelProfile:
+    """Recent (audio seconds, wall seconds) runs of one model, fitted to
+    wall = fixed + per_second * audio. fixed covers spawn and model load on
+    the cli backend and is near zero for a warm server."""
+
+    def __init__(self, samples: Optional[List[Tuple[float, float]]] = None, max_samples: int = 50):
+        self.samples = deque(samples or [], maxlen=max_samples)
+        self.fixed, self.per_second = self._fit()
+
+    def add(self, audio_seconds: float, seconds: float):
+        self.samples.append((round(audio_seconds, 3), round(seconds, 4)))
+        self.fixed, self.per_second = self._fit()
+
+    def _fit(self) -> Tuple[float, float]:
+        if not self.samples:
+            return 0.0, 0.0
+        n = len(self.samples)
+        mean_x = sum(x for x, _ in self.samples) / n
+        mean_y = sum(y for _, y in self.samples) / n
+        var = sum((x - mean_x) ** 2 for x, _ in self.samples)
+        if var < 1e-6 or mean_x <= 0:
+            # One clip length only: charge it all to the audio, which overestimates short clips
+            return 0.0, mean_y / max(mean_x, 1e-3)
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in self.samples) / var
+        slope = max(0.0, slope)
+        return max(0.0, mean_y - slope * mean_x), slope
+
+    def predict(self, audio_seconds: float) -> float:
+        return self.fixed + self.per_second * audio_seconds
+
+class ModelManager:
+    """Picks a whisper model per clip: the most accurate one whose profiled
+    latency fits the budget (budget_base + budget_ratio * audio seconds), so
+    short dictation goes to a tiny or quantized model and long clips can
+    afford a larger one.
+
+    Stands in for a WhisperTranscriber (transcribe, transcribe_pcm, warm_up,
+    configure, close), holding one per model. Profiles are learned from
+    every run and seeded by profile_models(); the models chosen most often
+    recently are kept warm (a running server, or the file in the page cache
+    for whisper-cli), up to max_warm.
+    """
+
+    def __init__(self, default_model: str = "models/ggml-base.en.bin", candidates: Optional[List[str]] = None,
+                 models_dir: Optional[str] = None, budget_base: float = 1.5, budget_ratio: float = 0.25,
+                 max_warm: int = 2, profile_path: str = PROFILE_FILE, **transcriber_options):
+        self.transcriber_options = transcriber_options
+        self.budget_base = budget_base
+        self.budget_ratio = budget_ratio
+        self.max_warm = max(1, max_warm)
+        self.profile_path = profile_path
+        self.lock = threading.Lock()
+        self.transcribers = {}
+        self.decode_config = {}
+        self.recent = deque(maxlen=20)
+        self.warm = set()
+        # Held by the one warm-up running; parallel segments would each re-read the model files
+        self.warm_lock = threading.Lock()
+
+        # The default model is checked exactly as a lone WhisperTranscriber would check it
+        self.default = WhisperTranscriber(model_path=default_model, **transcriber_options)
+        self.whisper_path = self.default.whisper_path
+        self.models_dir = models_dir or os.path.join(self.whisper_path, "models")
+        default_info = parse_model(self.default.model_path)
+        models = discover_models(self.models_dir)
+        if candidates:
+            models = [m for m in models if os.path.basename(m.path) in candidates or m.name in candidates]
+        self.models = {m.name: m for m in models}
+        if default_info is None:
+            name = os.path.splitext(os.path.basename(self.default.model_path))[0]
+            default_info = ModelInfo(name, self.default.model_path, name, False, None,
+                                     os.path.getsize(self.default.model_path))
+        self.default_model = default_info
+        self.models[default_info.name] = default_info
+        self.transcribers[default_info.name] = self.default
+        self.profiles = self.load_profiles()
+        logging.info("Model manager: %s (default %s)", ", ".join(sorted(self.models)), default_info.name)
+
+    @property
+    def backend(self) -> str:
+        return self.default.backend
+
+    @property
+    def threads(self) -> int:
+        return self.default.threads
+
+    @property
+    def model_path(self) -> str:
+        return self.default.model_path
+
+    def _profile_key(self, model: ModelInfo) -> str:
+        # A warm server and a cold whisper-cli have very different fixed costs
+        return f"{machine_key(model.path)}|{self.backend}|{self.threads}"
+
+    def load_profiles(self) -> Dict[str, ModelProfile]:
+        stored = {}
+        if os.path.exists(self.profile_path):
+            try:
+                with open(self.profile_path, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+            except Exception as e:
+                logging.error(f"Error reading model profiles {self.profile_path}: {str(e)}")
+        return {
+            name: ModelProfile([tuple(s) for s in stored.get(self._profile_key(model), [])])
+            for name, model in self.models.items()
+        }
+
+    def save_profiles(self):
+        stored = {}
+        if os.path.exists(self.profile_path):
+            try:
+                with open(self.profile_path, "r", encoding="utf-8") as f:
+                    stored = json.load(f)
+            except Exception as e:
+                logging.warning(f"Replacing unreadable model profiles {self.profile_path}: {str(e)}")
+        with self.lock:
+            for name, profile in self.profiles.items():
+                if profile.samples:
+                    stored[self._profile_key(self.models[name])] = list(profile.samples)
+        try:
+            with open(self.profile_path, "w", encoding="utf-8") as f:
+                json.dump(stored, f, indent=2)
+        except Exception as e:
+            logging.error(f"Error saving model profiles: {str(e)}")
+
+    def transcriber_for(self, model: ModelInfo) -> WhisperTranscriber:
+        with self.lock:
+            transcriber = self.transcribers.get(model.name)
+            if transcriber is None:
+                # Only the default server may hold a fixed port
+                options = dict(self.transcriber_options, server_port=0)
+                transcriber = WhisperTranscriber(model_path=model.path, **options)
+                if self.decode_config:
+                    transcriber.configure(**self.decode_config)
+                self.transcribers[model.name] = transcriber
+            return transcriber
+
+    def budget(self, audio_seconds: float) -> float:
+        return self.budget_base + self.budget_ratio * audio_seconds
+
+    def choose(self, audio_seconds: float) -> ModelInfo:
+        """The most accurate profiled model predicted to finish within the
+        budget, else the fastest one; the default until profiles exist"""
+        budget = self.budget(audio_seconds)
+        with self.lock:
+            predicted = {
+                name: profile.predict(audio_seconds)
+                for name, profile in self.profiles.items() if profile.samples
+            }
+        if not predicted:
+            return self.default_model
+        fitting = [self.models[name] for name, seconds in predicted.items() if seconds <= budget]
+        if fitting:
+            return max(fitting, key=lambda m: (m.quality(), -predicted[m.name]))
+        return self.models[min(predicted, key=predicted.get)]
+
+    def transcribe_pcm(self, pcm: bytes, rate: int = 16000, channels: int = 1, sample_width: int = 2,
+                       timings: Optional[dict] = None, **kwargs) -> Optional[str]:
+        audio_seconds = len(pcm) / (rate * channels * sample_width)
+        return self._transcribe(audio_seconds, timings, lambda transcriber, run_timings: transcriber.transcribe_pcm(
+            pcm, rate=rate, channels=channels, sample_width=sample_width, timings=run_timings, **kwargs
+        ))
+
+    def transcribe(self, audio_path: str, timings: Optional[dict] = None, **kwargs) -> Optional[str]:
+        try:
+            with wave.open(audio_path, "rb") as wf:
+                audio_seconds = wf.getnframes() / wf.getframerate()
+        except Exception:
+            audio_seconds = 0.0
+        return self._transcribe(audio_seconds, timings, lambda transcriber, run_timings: transcriber.transcribe(
+            audio_path, timings=run_timings, **kwargs
+        ))
+
+    def _transcribe(self, audio_seconds: float, timings: Optional[dict], run) -> Optional[str]:
+        model = self.choose(audio_seconds)
+        transcriber = self.transcriber_for(model)
+        logging.debug("Transcribing %.1fs with %s (budget %.2fs)", audio_seconds, model.name,
+                      self.budget(audio_seconds))
+        METRICS.increment(f"model.{model.name}")
+        self.note_used(model)
+        run_timings = {}
+        start = time.perf_counter()
+        try:
+            text = run(transcriber, run_timings)
+        finally:
+            if timings is not None:
+                for stage, seconds in run_timings.items():
+                    timings[stage] = timings.get(stage, 0.0) + seconds
+        elapsed = time.perf_counter() - start
+        # Cache hits and server restarts say nothing about the model's speed
+        decoded = "decode" in run_timings and not (self.backend == "server" and "model_load" in run_timings)
+        if text is not None and decoded:
+            with self.lock:
+                self.profiles[model.name].add(audio_seconds, elapsed)
+        return text
+
+    def note_used(self, model: ModelInfo):
+        self.recent.append(model.name)
+        if set(self.expected()) != self.warm and self.warm_lock.acquire(blocking=False):
+            threading.Thread(target=self._warm_up_and_release, daemon=True, name="model-warm-up").start()
+
+    def _warm_up_and_release(self):
+        try:
+            self._warm_up()
+        finally:
+            self.warm_lock.release()
+
+    def expected(self) -> List[str]:
+        """Models to keep warm: the default plus the most used recent choices"""
+        names = [self.default_model.name]
+        for name, _ in Counter(self.recent).most_common():
+            if len(names) >= self.max_warm:
+                break
+            if name not in names:
+                names.append(name)
+        return names
+
+    def warm_up(self):
+        with self.warm_lock:
+            self._warm_up()
+
+    def _warm_up(self):
+        expected = self.expected()
+        for name in expected:
+            model = self.models[name]
+            transcriber = self.transcriber_for(model)
+            if transcriber.server:
+                transcriber.warm_up()
+            elif name not in self.warm:
+                _prefetch(model.path)
+        with self.lock:
+            idle = [t for name, t in self.transcribers.items() if name not in expected and t.server]
+        for transcriber in idle:
+            # Frees the server's memory once its request in flight is done; it restarts if picked again
+            with transcriber.server._lock:
+                transcriber.server.stop()
+        self.warm = set(expected)
+        logging.info("Warm models: %s", ", ".join(expected))
+
+    def configure(self, **config):
+        """Apply decode settings (e.g. the tuned ones) to every model"""
+        config = {k: v for k, v in config.items() if v is not None}
+        threads_changed = config.get("threads", self.threads) != self.threads
+        if threads_changed:
+            self.save_profiles()
+        self.decode_config.update(config)
+        with self.lock:
+            transcribers = list(self.transcribers.values())
+        for transcriber in transcribers:
+            transcriber.configure(**config)
+        if threads_changed:
+            # Profiles are per thread count
+            self.profiles = self.load_profiles()
+
+    def profile_models(self, clip_path: str, force: bool = False):
+        """Time every model without a profile on a short prefix and the whole
+        of clip_path, so choose() has numbers before real clips arrive"""
+        try:
+            with wave.open(clip_path, "rb") as wf:
+                rate, channels, sample_width = wf.getframerate(), wf.getnchannels(), wf.getsampwidth()
+                pcm = wf.readframes(wf.getnframes())
+        except Exception as e:
+            logging.warning(f"Cannot profile models with {clip_path}: {str(e)}")
+            return
+        frame = channels * sample_width
+        short = pcm[:int(3 * rate) * frame]
+        for model in sorted(self.models.values(), key=lambda m: m.size):
+            with self.lock:
+                if self.profiles[model.name].samples and not force:
+                    continue
+            try:
+                # A copy without the transcript cache: repeats must really be decoded, and
+                # recordings made meanwhile keep the live transcriber and its cache
+                transcriber = self.transcriber_for(model).copy(cache=None)
+                transcriber.warm_up()
+            except Exception as e:
+                logging.error(f"Error profiling {model.name}: {str(e)}")
+                continue
+            try:
+                for clip in (short, pcm):
+                    self.transcribe_with(model, clip, rate, channels, sample_width, transcriber)
+            finally:
+                transcriber.close()
+            profile = self.profiles[model.name]
+            logging.info("Profiled %s: %.2fs + %.3fs per audio second", model.name,
+                         profile.fixed, profile.per_second)
+        self.save_profiles()
+
+    def transcribe_with(self, model: ModelInfo, pcm: bytes, rate: int, channels: int, sample_width: int,
+                        transcriber: Optional[WhisperTranscriber] = None):
+        transcriber = transcriber or self.transcriber_for(model)
+        timings = {}
+        start = time.perf_counter()
+        text = transcriber.transcribe_pcm(pcm, rate=rate, channels=channels, sample_width=sample_width,
+                                          timings=timings)
+        if text is not None and "decode" in timings:
+            with self.lock:
+                self.profiles[model.name].add(len(pcm) / (rate * channels * sample_width),
+                                              time.perf_counter() - start)
+
+    def close(self):
+        self.save_profiles()
+        with self.lock:
+            transcribers = list(self.transcribers.values())
+        for transcriber in transcribers:
+            transcriber.close()
+
+def _prefetch(path: str, chunk_size: int = 16 * 1024 * 1024):
+    # Reading the file once puts it in the OS page cache, so whisper-cli's model load is a memory copy
+    try:
+        with open(path, "rb") as f:
+            while f.read(chunk_size):
+                pass
+    except OSError as e:
+        logging.warning(f"Could not prefetch {path}: {str(e)}")
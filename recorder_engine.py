@@ -0,0 +1,715 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Optional
+from whisper_cpp_wrapper import WhisperTranscriber
+from transcription_pipeline import TranscriptionPipeline
+from transcription_queue import TranscriptionJob, TranscriptionQueue
+from capture_buffer import CaptureBuffer, PreRollBuffer, SpillBuffer
+from history_store import HistoryStore
+from transcript_cache import TranscriptCache
+from recording_archive import RecordingArchive
+from whisper_tuning import auto_tune
+from model_manager import ModelManager
+from metrics import METRICS
+
+def _run_in_thread(callback: Callable[[], None]):
+    threading.Thread(target=callback, daemon=True).start()
+
+class RecorderEngine:
+    """Capture and transcription without any GUI or Win32 dependency.
+
+    Front ends (the Tk window, the headless daemon) drive it with
+    start_recording/stop_recording and are told what happened through the
+    on_* callbacks. Callbacks and internal follow-ups such as stopping at
+    the maximum duration go through `dispatch`, which should run them on the
+    front end's own thread (the Tk app passes window.after). PyAudio is only
+    imported when audio=True.
+
+    The constructor only does what is instant; start() runs the slow part
+    (legacy history import, audio device probing, whisper setup and warm-up)
+    on a background thread, reporting through on_progress(message, fraction).
+    A recording requested before the audio device is ready starts as soon as
+    it is.
+
+    With a draft model, on_draft_transcription(text, stopped_at) shows a fast
+    first pass of a recording; its history entry is replaced by the full
+    transcription, which then arrives through on_transcription as usual.
+    """
+
+    def __init__(self, settings: dict, recordings_dir: str = "recordings", audio: bool = True,
+                 dispatch: Optional[Callable[[Callable[[], None]], None]] = None,
+                 on_recording_changed: Optional[Callable[[bool], None]] = None,
+                 on_first_audio: Optional[Callable[[float], None]] = None,
+                 on_transcription: Optional[Callable[[str, float], None]] = None,
+                 on_draft_transcription: Optional[Callable[[str, float], None]] = None,
+                 on_partial_transcription: Optional[Callable[[str, float], None]] = None,
+                 on_transcription_failed: Optional[Callable[[TranscriptionJob], None]] = None,
+                 on_queue_changed: Optional[Callable[[], None]] = None,
+                 on_progress: Optional[Callable[[str, float], None]] = None):
+        self.settings = settings
+        self.recordings_dir = recordings_dir
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        self.dispatch = dispatch or _run_in_thread
+        self.on_recording_changed = on_recording_changed
+        self.on_first_audio = on_first_audio
+        self.on_transcription = on_transcription
+        self.on_draft_transcription = on_draft_transcription
+        self.on_partial_transcription = on_partial_transcription
+        self.on_transcription_failed = on_transcription_failed
+        self.on_queue_changed = on_queue_changed
+        self.on_progress = on_progress
+        self.archive = settings["archive_recordings"]
+        # No length limit; audio spills to a memory-mapped file (applies from the next recording)
+        self.long_recording = settings["long_recording"]
+        self.audio = audio
+        self.created_at = time.perf_counter()
+        # Set once recordings can start; whisper may still be warming up then
+        self.ready = threading.Event()
+        self.ready_lock = threading.Lock()
+        self.startup_times = {}
+
+        self.setup_audio_format()
+        self.setup_variables()
+        self.setup_history()
+        self.setup_queue()
+        self.setup_metrics()
+
+    def setup_audio_format(self):
+        # 16-bit mono at 16 kHz, which is what whisper expects
+        self.chunk = 1024
+        self.channels = 1
+        self.rate = 16000
+        self.max_duration = self.settings["max_recording_seconds"]
+        self.sample_width = 2
+        self.p = None
+        self.transcriber = None
+        self.drafter = None
+        self.pipeline = None
+        self.cache = None
+        self.preroll_seconds = self.settings["preroll_seconds"]
+        self.preroll = PreRollBuffer(int(self.preroll_seconds * self.rate) * self.sample_width * self.channels)
+        self.buffer_pool = []
+
+    def setup_audio(self):
+        # Importing PyAudio and probing the devices takes a noticeable moment
+        import pyaudio
+        self.format = pyaudio.paInt16
+        self.pa_continue = pyaudio.paContinue
+        self.p = pyaudio.PyAudio()
+
+    def start(self):
+        """Run the slow part of the setup in the background"""
+        threading.Thread(target=self.initialize, daemon=True, name="engine-init").start()
+
+    def initialize(self):
+        try:
+            if os.path.exists(os.path.join(self.recordings_dir, "history.txt")):
+                self._progress("Importing history...", 0.1)
+                self.import_legacy_history()
+            if self.audio:
+                self._progress("Opening audio device...", 0.25)
+                try:
+                    self.setup_audio()
+                    self.setup_capture()
+                except Exception as e:
+                    logging.error(f"Error initializing audio: {str(e)}", exc_info=True)
+            self._progress("Starting whisper...", 0.5)
+            self.setup_whisper()
+        finally:
+            self._startup_time("ready")
+            with self.ready_lock:
+                self.ready.set()
+                requested_at, self.start_pending = self.start_pending, None
+        if requested_at is not None:
+            self.dispatch(lambda: self.start_recording(requested_at))
+        if self.transcriber:
+            # Tune decode settings (once per machine) and load the model before the first recording
+            self._progress("Loading whisper model...", 0.75)
+            self.warm_up_whisper()
+        self._startup_time("whisper_ready")
+        self._progress("", 1.0)
+
+    def _progress(self, message: str, fraction: float):
+        logging.debug("Startup: %s", message or "done")
+        self._notify(self.on_progress, message, fraction)
+
+    def _startup_time(self, stage: str):
+        seconds = time.perf_counter() - self.created_at
+        self.startup_times[stage] = seconds
+        METRICS.record(f"startup.{stage}", seconds)
+        logging.info("Startup: %s after %.2fs", stage, seconds)
+
+    def setup_variables(self):
+        self.recording = False
+        self.stream = None
+        self.stop_event = None
+        self.monitoring = False
+        self.capture_lock = threading.Lock()
+        self.capture_target = None
+        # Draft state of each queued recording in capture order; drafts are shown in that order
+        self.draft_order = deque()
+        self.draft_lock = threading.Lock()
+        self.buffer = None
+        self.start_requested_at = None
+        self.start_pending = None
+        self.start_latencies = deque(maxlen=100)
+        self.splitter = None
+        self.incremental = None
+        # Cancels the current recording's transcription, from its first segment to the tail
+        self.cancel_event = None
+        self.current_recording_thread = None
+        self.start_time = None
+        self.recording_long = False
+        logging.debug("Variables initialized")
+
+    def setup_history(self):
+        self.history = HistoryStore(os.path.join(self.recordings_dir, "history.db"))
+        self.recording_archive = None
+        if self.settings["archive_format"] == "container":
+            self.recording_archive = RecordingArchive(
+                os.path.join(self.recordings_dir, "archive"),
+                segment_bytes=int(self.settings["archive_segment_mb"] * 1024 * 1024)
+            )
+
+    def import_legacy_history(self):
+        legacy_file = os.path.join(self.recordings_dir, "history.txt")
+        try:
+            self.history.import_legacy(legacy_file)
+        except Exception as e:
+            logging.error(f"Error importing {legacy_file}: {str(e)}", exc_info=True)
+
+    def setup_capture(self):
+        # A warm stream makes start/stop a flag flip; pre-roll needs it to hear audio before the hotkey
+        if self.p is None or (not self.settings["warm_stream"] and self.preroll.size == 0):
+            return
+        try:
+            self.stream = self.open_stream(callback=self.on_audio)
+            self.monitoring = True
+            logging.info(f"Input stream kept warm in callback mode with {self.preroll_seconds}s pre-roll")
+        except Exception as e:
+            logging.error(f"Error opening warm input stream: {str(e)}", exc_info=True)
+            self.stream = None
+            self.monitoring = False
+
+    def setup_whisper(self):
+        try:
+            if self.settings["transcript_cache"]:
+                self.cache = TranscriptCache(
+                    os.path.join(self.recordings_dir, "transcript_cache.db"),
+                    max_bytes=int(self.settings["transcript_cache_mb"] * 1024 * 1024)
+                )
+            options = {
+                "backend": self.settings["backend"],
+                "threads": self.settings["whisper_threads"],
+                "server_port": self.settings["server_port"],
+                "server_startup_timeout": self.settings["server_startup_timeout"],
+                "cache": self.cache,
+                "deadline_base": self.settings["transcription_deadline_base"],
+                "deadline_ratio": self.settings["transcription_deadline_ratio"]
+            }
+            if self.settings["model_selection"] == "auto":
+                self.transcriber = ModelManager(
+                    self.settings["whisper_model"],
+                    candidates=self.settings["models"],
+                    budget_base=self.settings["latency_budget_base"],
+                    budget_ratio=self.settings["latency_budget_ratio"],
+                    max_warm=self.settings["max_warm_models"],
+                    **options
+                )
+            else:
+                self.transcriber = WhisperTranscriber(model_path=self.settings["whisper_model"], **options)
+            logging.info(f"Whisper transcriber initialized successfully ({self.transcriber.backend} backend)")
+            if self.settings["draft_model"]:
+                # Its own server, so only the main one holds server_port
+                self.drafter = WhisperTranscriber(
+                    model_path=self.settings["draft_model"], **dict(options, server_port=0)
+                )
+                logging.info(f"Two-pass transcription with draft model {self.settings['draft_model']}")
+            self.pipeline = TranscriptionPipeline(
+                self.transcriber,
+                self.settings,
+                recordings_dir=self.recordings_dir,
+                rate=self.rate,
+                channels=self.channels,
+                sample_width=self.sample_width,
+                archive=self.recording_archive,
+                drafter=self.drafter
+            )
+        except Exception as e:
+            logging.error(f"Error initializing Whisper: {str(e)}", exc_info=True)
+
+    def warm_up_whisper(self):
+        try:
+            clip = self.settings["calibration_clip"] or os.path.join(
+                self.transcriber.whisper_path, "samples", "jfk.wav"
+            )
+            manager = self.transcriber if isinstance(self.transcriber, ModelManager) else None
+            if self.settings["auto_tune"]:
+                # Tuned on the default model; the manager applies the result to all of them
+                target = manager.default if manager else self.transcriber
+                tuning = auto_tune(target, clip, self.settings["tuning_max_wer"])
+                if manager and tuning:
+                    manager.configure(threads=tuning["threads"], beam_size=tuning["beam_size"],
+                                      best_of=tuning["best_of"])
+            self.transcriber.warm_up()
+            if self.drafter:
+                self.drafter.warm_up()
+            if manager:
+                manager.profile_models(clip)
+        except Exception as e:
+            logging.error(f"Error warming up Whisper backend: {str(e)}", exc_info=True)
+
+    def setup_queue(self):
+        # Parallel workers only help the cli backend; the server decodes one clip at a time
+        self.queue = TranscriptionQueue(
+            workers=self.settings["transcription_workers"],
+            on_result=self.on_job_finished,
+            on_change=self.notify_queue_changed
+        )
+
+    def setup_metrics(self):
+        self.metrics_stop = threading.Event()
+        if not (self.settings["metrics_json"] or self.settings["metrics_prometheus"]):
+            return
+        # Exported off the front end's thread so a slow disk never stalls it
+        threading.Thread(target=self.export_metrics_loop, daemon=True).start()
+
+    def export_metrics_loop(self):
+        while not self.metrics_stop.wait(self.settings["metrics_export_seconds"]):
+            self.export_metrics()
+
+    def export_metrics(self):
+        METRICS.export(self.settings["metrics_json"], self.settings["metrics_prometheus"])
+
+    def _notify(self, callback: Optional[Callable], *args):
+        if callback:
+            self.dispatch(lambda: callback(*args))
+
+    def toggle_recording(self, requested_at: Optional[float] = None):
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug("Toggle recording called. Current state - recording: %s, queued jobs: %d",
+                          self.recording, len(self.queue.pending()))
+        if not self.recording:
+            self.start_recording(requested_at)
+        else:
+            self.stop_recording()
+
+    def start_recording(self, requested_at: Optional[float] = None) -> bool:
+        """Start capturing; requested_at (perf_counter) is when the user asked,
+        for the hotkey-to-first-sample latency"""
+        try:
+            if self.recording:
+                logging.debug("Ignoring start_recording while already recording")
+                return False
+            with self.ready_lock:
+                if not self.ready.is_set():
+                    # Asking again before the device is ready takes the request back
+                    if self.start_pending is None:
+                        self.start_pending = requested_at or time.perf_counter()
+                        self._progress("Recording starts once the audio device is ready...", 0.25)
+                    else:
+                        self.start_pending = None
+                        self._progress("Opening audio device...", 0.25)
+                    return False
+            if self.p is None:
+                raise RuntimeError("No audio input available")
+
+            logging.debug("Starting recording")
+            self.recording = True
+            self.start_time = time.time()
+            requested_at = requested_at or time.perf_counter()
+            # Cleared by the audio thread at the first sample, possibly before this method returns
+            self.start_requested_at = requested_at
+            self.recording_long = self.long_recording
+            self.buffer = self.acquire_buffer(self.recording_long)
+            self.start_incremental_transcription()
+
+            if self.monitoring:
+                # The stream is already open: the pre-roll becomes the start of the recording
+                with self.capture_lock:
+                    self.preroll.drain_into(self.buffer)
+                    if self.splitter and len(self.buffer):
+                        self.splitter.push(self.buffer.getbuffer())
+                    self.capture_target = (self.buffer, self.splitter, self.incremental)
+            else:
+                if self.stream is not None:
+                    try:
+                        logging.debug("Cleaning up existing stream")
+                        self.stream.stop_stream()
+                        self.stream.close()
+                    except Exception as e:
+                        logging.error(f"Error cleaning up stream: {str(e)}", exc_info=True)
+                    self.stream = None
+
+                logging.debug("Opening new audio stream")
+                self.stream = self.open_stream()
+                self.stop_event = threading.Event()
+
+                logging.debug("Starting recording thread")
+                self.current_recording_thread = threading.Thread(
+                    target=self.record_audio,
+                    args=(self.stream, self.buffer, self.stop_event, self.splitter, self.incremental)
+                )
+                self.current_recording_thread.start()
+
+            # Hotkey (or click) to capturing, before the first sample arrives
+            METRICS.record("capture.request_to_start", time.perf_counter() - requested_at)
+            logging.info("Started recording")
+            self._notify(self.on_recording_changed, True)
+            return True
+        except Exception as e:
+            logging.error(f"Error in start_recording: {str(e)}", exc_info=True)
+            self.cleanup_recording()
+            return False
+
+    def open_stream(self, callback=None):
+        return self.p.open(
+            format=self.format,
+            channels=self.channels,
+            rate=self.rate,
+            input=True,
+            frames_per_buffer=self.chunk,
+            stream_callback=callback
+        )
+
+    def acquire_buffer(self, long_recording: bool = False):
+        if long_recording:
+            return SpillBuffer(self.recordings_dir)
+        # Buffers go back to the pool once their transcription job is done
+        try:
+            buffer = self.buffer_pool.pop()
+            buffer.reset()
+            return buffer
+        except IndexError:
+            seconds = self.max_duration + self.preroll_seconds
+            return CaptureBuffer(int(seconds * self.rate) * self.sample_width * self.channels)
+
+    def release_buffer(self, buffer):
+        if isinstance(buffer, SpillBuffer):
+            buffer.close()
+        else:
+            self.buffer_pool.append(buffer)
+
+    def start_incremental_transcription(self):
+        self.splitter = None
+        self.incremental = None
+        self.cancel_event = threading.Event()
+        if self.pipeline:
+            self.splitter, self.incremental = self.pipeline.start_incremental(
+                self.recording_long, self.cancel_event
+            )
+
+    def cleanup_recording(self):
+        try:
+            logging.debug("Cleaning up recording state")
+            self.recording = False
+            self.start_time = None
+            if self.incremental:
+                self.incremental.cancel()
+                self.incremental = None
+            if self.monitoring:
+                with self.capture_lock:
+                    self.capture_target = None
+            else:
+                if self.stop_event:
+                    self.stop_event.set()
+                if self.stream:
+                    try:
+                        self.stream.stop_stream()
+                        self.stream.close()
+                    except Exception as e:
+                        logging.error(f"Error closing stream during cleanup: {str(e)}", exc_info=True)
+                    self.stream = None
+        except Exception as e:
+            logging.error(f"Error in cleanup_recording: {str(e)}", exc_info=True)
+        self._notify(self.on_recording_changed, False)
+
+    def capture_chunk(self, data, buffer, splitter, incremental):
+        """Store one chunk of a recording; returns False once the recording is full"""
+        with METRICS.span("capture.chunk"):
+            has_room = buffer.write(data)
+            if splitter:
+                segment = splitter.push(data)
+                if segment:
+                    start, end, overlapped = segment
+                    incremental.submit(buffer.getbuffer(start, end), overlapped)
+        return has_room
+
+    def on_audio(self, in_data, frame_count, time_info, status):
+        """PyAudio callback for the warm stream: routes each chunk to the
+        active recording, or to the pre-roll between recordings"""
+        latency = None
+        full = False
+        with self.capture_lock:
+            target = self.capture_target
+            if target is None:
+                self.preroll.write(in_data)
+            else:
+                latency = self.note_first_sample()
+                if not self.capture_chunk(in_data, *target):
+                    self.capture_target = None
+                    full = True
+        # Dispatching may wait for the front end's thread, which may be waiting for capture_lock
+        self.report_first_sample(latency)
+        if full:
+            logging.info("Max duration reached")
+            self.dispatch(self.stop_recording)
+        return (None, self.pa_continue)
+
+    def note_first_sample(self) -> Optional[float]:
+        """Hotkey-to-first-sample latency of the recording that just started,
+        once; None for every later chunk"""
+        if self.start_requested_at is None:
+            return None
+        latency = time.perf_counter() - self.start_requested_at
+        self.start_requested_at = None
+        self.start_latencies.append(latency)
+        METRICS.record("capture.start_latency", latency)
+        return latency
+
+    def report_first_sample(self, latency: Optional[float]):
+        # Kept apart from note_first_sample so it runs outside capture_lock
+        if latency is None:
+            return
+        logging.info("First audio %.0f ms after start request", latency * 1000)
+        self._notify(self.on_first_audio, latency)
+
+    def record_audio(self, stream, buffer, stop_event, splitter, incremental):
+        # Everything this recording touches is passed in, so a new recording can
+        # start while this one is still waiting in the transcription queue
+        failed = False
+        full = False
+        try:
+            logging.debug("Starting audio recording loop")
+            while not stop_event.is_set():
+                try:
+                    data = stream.read(self.chunk, exception_on_overflow=False)
+                except Exception as e:
+                    if not stop_event.is_set():
+                        logging.error(f"Error reading audio data: {str(e)}", exc_info=True)
+                        failed = True
+                    break
+                self.report_first_sample(self.note_first_sample())
+                if not self.capture_chunk(data, buffer, splitter, incremental):
+                    full = True
+                    break
+
+            logging.debug("Recording loop ended")
+            if full and not stop_event.is_set():
+                logging.info("Max duration reached")
+                self.dispatch(self.stop_recording)
+        except Exception as e:
+            logging.error(f"Error in record_audio thread: {str(e)}", exc_info=True)
+            failed = True
+        finally:
+            if failed and not stop_event.is_set():
+                logging.debug("Forcing recording cleanup from thread")
+                self.dispatch(self.cleanup_recording)
+
+    def stop_recording(self):
+        """Hand the current recording to the transcription queue; returns its job"""
+        try:
+            if not self.recording:
+                with self.ready_lock:
+                    if self.start_pending is not None:
+                        # Released (push-to-talk) before the device was ready
+                        self.start_pending = None
+                        self._progress("Opening audio device...", 0.25)
+                        return None
+                logging.debug("Ignoring stop_recording while not recording")
+                return None
+
+            logging.debug("Stopping recording")
+            stopped_at = time.perf_counter()
+            self.recording = False
+            self.start_time = None
+            thread = None
+
+            if self.monitoring:
+                # Keep the stream open; new audio goes back to the pre-roll
+                with self.capture_lock:
+                    self.capture_target = None
+            else:
+                self.stop_event.set()
+                thread = self.current_recording_thread
+                if self.stream:
+                    try:
+                        self.stream.stop_stream()
+                        self.stream.close()
+                        self.stream = None
+                    except Exception as e:
+                        logging.error(f"Error closing stream: {str(e)}", exc_info=True)
+
+            # Hand the finished recording to the queue; recording is available again right away
+            buffer, splitter, incremental = self.buffer, self.splitter, self.incremental
+            archive = self.archive
+            self.incremental = None
+            draft = {}
+            with self.draft_lock:
+                self.draft_order.append(draft)
+            on_partial = self.partial_callback(stopped_at, draft)
+            on_draft = self.draft_callback(stopped_at, draft)
+            cancel_event = self.cancel_event or threading.Event()
+            job = self.queue.submit(
+                lambda: self.process_recording(buffer, thread, splitter, incremental, archive,
+                                               on_partial, cancel_event, on_draft),
+                cancel_event,
+                draft,
+                on_skip=lambda: self.discard_recording(buffer, thread, incremental, archive)
+            )
+            logging.debug("Queued recording as job %d", job.id)
+            self._notify(self.on_recording_changed, False)
+            return job
+        except Exception as e:
+            logging.error(f"Error in stop_recording: {str(e)}", exc_info=True)
+            self.cleanup_recording()
+            return None
+
+    def process_recording(self, buffer, thread, splitter, incremental, archive, on_partial=None,
+                          cancel_event=None, on_draft=None):
+        logging.debug("Processing recording")
+        if thread:
+            thread.join(timeout=1)
+        try:
+            return self.pipeline.save_and_transcribe(buffer, splitter, incremental, archive,
+                                                     on_partial=on_partial, cancel_event=cancel_event,
+                                                     on_draft=on_draft)
+        finally:
+            self.release_buffer(buffer)
+
+    def discard_recording(self, buffer, thread, incremental, archive):
+        """For a recording whose job was cancelled before it started: what
+        process_recording does when a running transcription is cancelled"""
+        if thread:
+            thread.join(timeout=1)
+        try:
+            if incremental:
+                incremental.discard()
+            if archive and self.pipeline:
+                # Keep the audio, as for a recording whose transcription was killed
+                self.pipeline.archive_recording(buffer, None)
+        finally:
+            self.release_buffer(buffer)
+
+    def partial_callback(self, stopped_at: float, draft: dict):
+        """Forwards the text of one recording to on_partial_transcription as
+        whisper decodes it, timing the first words"""
+        first_words = []
+
+        def on_partial(text, fraction):
+            if draft:
+                # Only the progress; the draft stays on screen until the full text is in
+                self._notify(self.on_partial_transcription, "", fraction)
+                return
+            if text and not first_words:
+                first_words.append(text)
+                latency = time.perf_counter() - stopped_at
+                METRICS.record("stop_to_first_words", latency)
+                logging.debug("First words %.0f ms after stop", latency * 1000)
+            self._notify(self.on_partial_transcription, text, fraction)
+        return on_partial
+
+    def draft_callback(self, stopped_at: float, draft: dict):
+        """Saves and shows the first-pass text of one recording; on_job_finished
+        replaces its history entry with the full transcription"""
+        def on_draft(text):
+            with self.draft_lock:
+                draft["held"] = (text, stopped_at)
+                self.show_drafts()
+        return on_draft
+
+    def show_drafts(self):
+        # Called with draft_lock held. A draft waits until every earlier
+        # recording has shown its draft or finished, like the queue's results.
+        while self.draft_order and "held" in self.draft_order[0]:
+            draft = self.draft_order.popleft()
+            text, stopped_at = draft.pop("held")
+            latency = time.perf_counter() - stopped_at
+            METRICS.record("stop_to_draft", latency)
+            logging.info("Draft %.0f ms after stop", latency * 1000)
+            draft["entry_id"] = self.add_transcription(text)
+            draft["text"] = text
+            self._notify(self.on_draft_transcription, text, stopped_at)
+
+    def cancel_transcriptions(self) -> int:
+        """Cancel every queued or running transcription; returns how many"""
+        return self.queue.cancel()
+
+    def on_job_finished(self, job):
+        # Called by the queue in capture order, on a worker thread
+        with self.draft_lock:
+            if self.draft_order and self.draft_order[0] is job.draft:
+                # Its draft was never shown; the result goes in its place
+                self.draft_order.popleft()
+                job.draft.pop("held", None)
+                self.show_drafts()
+        if job.state == TranscriptionJob.DONE and not job.result:
+            # No speech, or whisper failed; the front end still has to reset its progress
+            job.error = job.error or "no text"
+        if job.state != TranscriptionJob.DONE or not job.result:
+            if job.draft:
+                logging.info("Keeping the draft of transcription job %d", job.id)
+            self._notify(self.on_transcription_failed, job)
+            return
+        if job.draft:
+            METRICS.record("stop_to_refined", time.perf_counter() - job.queued_at)
+            self.replace_transcription(job.draft["entry_id"], job.result)
+            # stopped_at is for the first text on screen, which was the draft
+            self._notify(self.on_transcription, job.result, None)
+            return
+        self.add_transcription(job.result)
+        self._notify(self.on_transcription, job.result, job.queued_at)
+
+    def notify_queue_changed(self):
+        self._notify(self.on_queue_changed)
+
+    def add_transcription(self, text, timestamp=None) -> Optional[int]:
+        if timestamp is None:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            return self.history.add(text, timestamp)
+        except Exception as e:
+            logging.error(f"Error saving history: {str(e)}")
+            return None
+
+    def replace_transcription(self, entry_id, text):
+        if entry_id is None:
+            # The draft never made it into the history
+            self.add_transcription(text)
+            return
+        try:
+            self.history.update(entry_id, text)
+        except Exception as e:
+            logging.error(f"Error updating history: {str(e)}")
+
+    def close(self):
+        logging.debug("Engine closing")
+        if self.recording:
+            self.stop_recording()
+        self.monitoring = False
+        if self.stream:
+            try:
+                self.stream.stop_stream()
+                self.stream.close()
+            except Exception as e:
+                logging.error(f"Error closing stream: {str(e)}", exc_info=True)
+            self.stream = None
+        self.queue.stop()
+        self.metrics_stop.set()
+        self.export_metrics()
+        self.history.close()
+        if self.recording_archive:
+            self.recording_archive.close()
+        if self.p:
+            self.p.terminate()
+        if self.transcriber:
+            self.transcriber.close()
+        if self.drafter:
+            self.drafter.close()
+        if self.cache:
+            logging.info("Transcript cache: %s", self.cache.stats())
+            self.cache.close()
@@ -0,0 +1,567 @@
+import customtkinter as ctk
+import time
+import logging
+import pyperclip
+from typing import Optional
+from hotkeys import HotkeyDispatcher, handle_hotkey, hotkey_label
+from history_store import parse_search
+from history_view import HistoryView
+from recorder_engine import RecorderEngine
+from settings import load_settings
+from metrics import METRICS
+from app_logging import set_log_level
+import console_window
+
+class WhisperRecorderApp:
+    """Tk front end over RecorderEngine"""
+
+    def __init__(self, settings: Optional[dict] = None, started_at: Optional[float] = None):
+        # started_at: perf_counter() at process start, for time-to-interactive
+        self.started_at = started_at or time.perf_counter()
+        self.settings = settings or load_settings()
+        
+        self.setup_window()
+        self.setup_variables()
+        self.setup_engine()
+        self.setup_hotkeys()
+        self.create_widgets()
+        
+        # Audio, whisper and the history import come up in the background;
+        # the window and hotkey work right away
+        self.engine.start()
+        self.window.after_idle(self.on_interactive)
+        
+    def setup_window(self):
+        self.window = ctk.CTk()
+        self.window.title("Whisper Recorder")
+        self.window.geometry("800x900")
+        self.window.configure(fg_color="#1a1a1a")
+        ctk.set_appearance_mode("dark")
+        ctk.set_default_color_theme("blue")
+        
+        # Make window centered
+        screen_width = self.window.winfo_screenwidth()
+        screen_height = self.window.winfo_screenheight()
+        x = (screen_width - 800) // 2
+        y = (screen_height - 900) // 2
+        self.window.geometry(f"800x900+{x}+{y}")
+        
+        # Add window close handler
+        self.window.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
+    def setup_variables(self):
+        self.interactive_after = None
+        self.auto_copy = ctk.BooleanVar(value=True)
+        self.show_console = ctk.BooleanVar(value=False)
+        self.debug_logging = ctk.BooleanVar(value=self.settings["log_level"].upper() == "DEBUG")
+        self.archive_recordings = ctk.BooleanVar(value=self.settings["archive_recordings"])
+        self.long_recording = ctk.BooleanVar(value=self.settings["long_recording"])
+        logging.debug("Variables initialized")
+        
+    def setup_engine(self):
+        # Engine callbacks arrive on the Tk thread via window.after
+        self.engine = RecorderEngine(
+            self.settings,
+            dispatch=lambda callback: self.window.after(0, callback),
+            on_recording_changed=self.on_recording_changed,
+            on_first_audio=self.show_start_latency,
+            on_transcription=self.update_transcription,
+            on_draft_transcription=self.show_draft_transcription,
+            on_partial_transcription=self.show_partial_transcription,
+            on_transcription_failed=self.show_transcription_failed,
+            on_queue_changed=self.update_queue_status,
+            on_progress=self.show_startup_progress
+        )
+        
+    def setup_hotkeys(self):
+        # The hook thread only queues timestamped events; they are applied here on the Tk thread
+        self.hotkeys = HotkeyDispatcher(
+            self.settings["hotkey"],
+            mode=self.settings["hotkey_mode"],
+            cancel_hotkey=self.settings["cancel_hotkey"]
+        )
+        try:
+            self.hotkeys.register()
+        except Exception as e:
+            logging.error(f"Error setting up hotkeys: {str(e)}", exc_info=True)
+        self.poll_hotkeys()
+            
+    def poll_hotkeys(self):
+        try:
+            self.hotkeys.drain(self.on_hotkey)
+        except Exception as e:
+            logging.error(f"Error handling hotkey: {str(e)}", exc_info=True)
+        self.window.after(self.settings["hotkey_poll_ms"], self.poll_hotkeys)
+        
+    def on_hotkey(self, event):
+        handle_hotkey(self.engine, event, on_cancel=self.show_cancelled)
+            
+    def create_widgets(self):
+        # Top section with gradient
+        self.top_frame = ctk.CTkFrame(self.window, fg_color="transparent")
+        self.top_frame.pack(fill="x", padx=40, pady=(40, 20))
+        
+        # Title
+        title = ctk.CTkLabel(
+            self.top_frame,
+            text="Whisper Recorder",
+            font=("Segoe UI", 24, "bold"),
+            text_color="#ffffff"
+        )
+        title.pack(pady=(0, 20))
+        
+        # Subtitle
+        subtitle = ctk.CTkLabel(
+            self.top_frame,
+            text="Record and transcribe your voice with one click",
+            font=("Segoe UI", 14),
+            text_color="#888888"
+        )
+        subtitle.pack(pady=(0, 30))
+        
+        # Settings section with hotkey info and console toggle
+        settings_frame = ctk.CTkFrame(self.window, fg_color="#222222", corner_radius=15)
+        settings_frame.pack(fill="x", padx=40, pady=(0, 20))
+        
+        # Settings grid for better organization
+        settings_grid = ctk.CTkFrame(settings_frame, fg_color="transparent")
+        settings_grid.pack(fill="x", padx=15, pady=15)
+        
+        # Hotkey info
+        hotkey_info = ctk.CTkLabel(
+            settings_grid,
+            text=(f"Hold {hotkey_label(self.settings['hotkey'])} to Record"
+                  if self.settings["hotkey_mode"] == "hold"
+                  else f"Press {hotkey_label(self.settings['hotkey'])} to Start/Stop Recording"),
+            font=("Segoe UI", 12, "bold"),
+            text_color="#ffffff"
+        )
+        hotkey_info.pack(side="left", padx=(0, 20))
+        
+        # Console toggle with icon-like symbol
+        self.console_toggle = ctk.CTkCheckBox(
+            settings_grid,
+            text="⌨ Show Console",
+            variable=self.show_console,
+            command=self.toggle_console,
+            font=("Segoe UI", 12),
+            fg_color="#4a9eff",
+            hover_color="#2d5a88",
+            corner_radius=4
+        )
+        self.console_toggle.pack(side="right")
+        
+        # Verbose logging can be switched on while chasing a problem, without a restart
+        self.debug_toggle = ctk.CTkCheckBox(
+            settings_grid,
+            text="Debug Log",
+            variable=self.debug_logging,
+            command=self.toggle_debug_logging,
+            font=("Segoe UI", 12),
+            fg_color="#4a9eff",
+            hover_color="#2d5a88",
+            corner_radius=4
+        )
+        self.debug_toggle.pack(side="right", padx=(0, 15))
+        
+        # Keep WAV and transcript files in recordings/ instead of transcribing in memory
+        self.archive_toggle = ctk.CTkCheckBox(
+            settings_grid,
+            text="Keep Recordings",
+            variable=self.archive_recordings,
+            command=self.toggle_archive,
+            font=("Segoe UI", 12),
+            fg_color="#4a9eff",
+            hover_color="#2d5a88",
+            corner_radius=4
+        )
+        self.archive_toggle.pack(side="right", padx=(0, 15))
+        
+        # Lift the length limit for meetings and long notes
+        self.long_toggle = ctk.CTkCheckBox(
+            settings_grid,
+            text="Long Recording",
+            variable=self.long_recording,
+            command=self.toggle_long_recording,
+            font=("Segoe UI", 12),
+            fg_color="#4a9eff",
+            hover_color="#2d5a88",
+            corner_radius=4
+        )
+        self.long_toggle.pack(side="right", padx=(0, 15))
+        
+        # Main recording section
+        self.record_frame = ctk.CTkFrame(self.window, fg_color="#222222", corner_radius=15)
+        self.record_frame.pack(fill="x", padx=40, pady=(0, 20))
+        
+        # Recording button with modern design
+        self.record_button = ctk.CTkButton(
+            self.record_frame,
+            text="Start Recording",
+            command=self.toggle_recording,
+            width=300,
+            height=60,
+            corner_radius=30,
+            font=("Segoe UI", 16, "bold"),
+            fg_color="#2d5a88",
+            hover_color="#1d3a58"
+        )
+        self.record_button.pack(pady=(30, 15))
+        
+        # Timer with modern font
+        self.timer_label = ctk.CTkLabel(
+            self.record_frame,
+            text="0:00",
+            font=("Segoe UI", 36, "bold"),
+            text_color="#4a9eff"
+        )
+        self.timer_label.pack(pady=(0, 10))
+        
+        # Progress bar with modern style
+        self.indicator = ctk.CTkProgressBar(
+            self.record_frame,
+            width=300,
+            height=4,
+            corner_radius=2,
+            fg_color="#333333",
+            progress_color="#4a9eff"
+        )
+        self.indicator.pack(pady=(0, 10))
+        self.indicator.set(0)
+        
+        # Status label with subtle color
+        self.status_label = ctk.CTkLabel(
+            self.record_frame,
+            text="",
+            font=("Segoe UI", 12),
+            text_color="#888888"
+        )
+        self.status_label.pack(pady=(0, 5))
+        
+        # Transcription queue depth and per-job state
+        self.queue_label = ctk.CTkLabel(
+            self.record_frame,
+            text="",
+            font=("Segoe UI", 11),
+            text_color="#666666"
+        )
+        self.queue_label.pack(pady=(0, 5))
+        
+        # Kills queued and running transcriptions; enabled while there are any
+        self.cancel_button = ctk.CTkButton(
+            self.record_frame,
+            text="Cancel Transcription",
+            command=self.cancel_transcriptions,
+            width=160,
+            height=28,
+            corner_radius=14,
+            font=("Segoe UI", 12),
+            fg_color="#444444",
+            hover_color="#cc3333",
+            state="disabled"
+        )
+        self.cancel_button.pack(pady=(0, 25))
+        
+        # Latest transcription section
+        latest_frame = ctk.CTkFrame(self.window, fg_color="#222222", corner_radius=15)
+        latest_frame.pack(fill="x", padx=40, pady=(0, 20))
+        
+        # Latest transcription header with settings
+        latest_header = ctk.CTkFrame(latest_frame, fg_color="transparent")
+        latest_header.pack(fill="x", padx=15, pady=(15, 0))
+        
+        latest_title = ctk.CTkLabel(
+            latest_header,
+            text="Latest Transcription",
+            font=("Segoe UI", 14, "bold"),
+            text_color="#ffffff"
+        )
+        latest_title.pack(side="left")
+        
+        # Auto-copy checkbox with modern style
+        self.auto_copy_check = ctk.CTkCheckBox(
+            latest_header,
+            text="Auto-copy to clipboard",
+            variable=self.auto_copy,
+            font=("Segoe UI", 12),
+            fg_color="#4a9eff",
+            hover_color="#2d5a88",
+            corner_radius=4
+        )
+        self.auto_copy_check.pack(side="right", padx=15)
+        
+        # Latest transcription text
+        self.latest_text = ctk.CTkTextbox(
+            latest_frame,
+            height=100,
+            font=("Segoe UI", 12),
+            fg_color="#2a2a2a",
+            text_color="#ffffff",
+            wrap="word"
+        )
+        self.latest_text.pack(fill="x", padx=15, pady=15)
+        
+        # History section with modern header
+        history_header = ctk.CTkFrame(self.window, fg_color="transparent")
+        history_header.pack(fill="x", padx=40, pady=(20, 10))
+        
+        history_title = ctk.CTkLabel(
+            history_header,
+            text="Transcription History",
+            font=("Segoe UI", 16, "bold"),
+            text_color="#ffffff"
+        )
+        history_title.pack(side="left")
+        
+        # Search box: words, prefix*, "phrases", from:/to: dates
+        self.search_entry = ctk.CTkEntry(
+            history_header,
+            placeholder_text='Search: words, prefix*, "phrase", from:2024-01-01 to:2024-01-31',
+            width=400,
+            font=("Segoe UI", 12),
+            fg_color="#2a2a2a",
+            border_color="#333333"
+        )
+        self.search_entry.pack(side="right")
+        self.search_entry.bind("<KeyRelease>", self.on_search_changed)
+        self.search_after_id = None
+        
+        # Virtualized history: only the visible rows exist as widgets
+        self.history_view = HistoryView(
+            self.window,
+            self.engine.history,
+            on_copy=self.copy_text,
+            fg_color="#222222",
+            corner_radius=15,
+            height=300
+        )
+        self.history_view.pack(fill="both", expand=True, padx=40, pady=(0, 40))
+        
+    def on_interactive(self):
+        # First idle moment of the event loop: the window is drawn and taking input
+        self.interactive_after = time.perf_counter() - self.started_at
+        METRICS.record("startup.interactive", self.interactive_after)
+        logging.info("Interactive %.2fs after launch", self.interactive_after)
+        if self.settings["hide_console"]:
+            self.hide_console()
+        self.load_history()
+        
+    def show_startup_progress(self, message, fraction):
+        if self.engine.recording:
+            return
+        if fraction < 1.0:
+            self.status_label.configure(text=message)
+            self.indicator.set(fraction)
+            return
+        self.indicator.set(0)
+        # Entries imported from a legacy history.txt in the meantime
+        self.history_view.refresh()
+        times = self.engine.startup_times
+        self.status_label.configure(
+            text=f"Ready: window {self.interactive_after or 0:.1f}s, "
+                 f"audio {times.get('ready', 0):.1f}s, whisper {times.get('whisper_ready', 0):.1f}s"
+        )
+        
+    def toggle_recording(self):
+        try:
+            self.engine.toggle_recording(time.perf_counter())
+        except Exception as e:
+            logging.error(f"Error in toggle_recording: {str(e)}", exc_info=True)
+            
+    def toggle_archive(self):
+        self.engine.archive = self.archive_recordings.get()
+        
+    def toggle_long_recording(self):
+        self.engine.long_recording = self.long_recording.get()
+        
+    def on_recording_changed(self, recording):
+        if recording:
+            self.show_recording_ui()
+        else:
+            self.reset_ui()
+            
+    def show_recording_ui(self):
+        if not self.engine.recording:
+            return
+        self.record_button.configure(
+            text="Stop Recording",
+            fg_color="#cc3333",
+            hover_color="#992222"
+        )
+        self.status_label.configure(text="Recording in progress...")
+        self.latest_text.delete("1.0", "end")
+        self.update_timer()
+        
+    def show_start_latency(self, latency=None):
+        latencies = self.engine.start_latencies
+        if not self.engine.recording or not latencies:
+            return
+        latest = latencies[-1] * 1000
+        median = sorted(latencies)[len(latencies) // 2] * 1000
+        self.status_label.configure(
+            text=f"Recording in progress... (audio after {latest:.0f} ms, median {median:.0f} ms)"
+        )
+        
+    def update_queue_status(self):
+        jobs = self.engine.queue.pending()
+        self.cancel_button.configure(state="normal" if jobs else "disabled")
+        if not jobs:
+            self.queue_label.configure(text="")
+            return
+        states = ", ".join(f"#{job.id + 1} {job.state}" for job in jobs)
+        self.queue_label.configure(text=f"Queue: {len(jobs)} ({states})")
+            
+    def cancel_transcriptions(self):
+        self.show_cancelled(self.engine.cancel_transcriptions())
+            
+    def show_cancelled(self, count):
+        if count and not self.engine.recording:
+            self.status_label.configure(text=f"Cancelling {count} transcription(s)...")
+            
+    def show_transcription_failed(self, job):
+        if self.engine.recording:
+            return
+        self.indicator.set(0)
+        if job.state == job.CANCELLED:
+            self.status_label.configure(text=f"Transcription #{job.id + 1} cancelled")
+        elif job.state == job.DONE:
+            # No speech detected, or whisper returned nothing
+            self.status_label.configure(text=f"Transcription #{job.id + 1} returned no text")
+        else:
+            self.status_label.configure(text=f"Transcription #{job.id + 1} failed: {job.error or 'no result'}")
+        if job.draft:
+            self.status_label.configure(text=self.status_label.cget("text") + " (draft kept)")
+            
+    def show_partial_transcription(self, text, fraction):
+        # A new recording owns the text box and progress bar
+        if self.engine.recording:
+            return
+        self.status_label.configure(text=f"Transcribing... {fraction:.0%}")
+        self.indicator.set(fraction)
+        if text:
+            self.latest_text.delete("1.0", "end")
+            self.latest_text.insert("1.0", text)
+            
+    def show_draft_transcription(self, text, stopped_at):
+        # Saved to the history already; update_transcription replaces it with the full text
+        with METRICS.span("ui.update_transcription"):
+            self.latest_text.delete("1.0", "end")
+            self.latest_text.insert("1.0", text)
+            if not self.engine.recording:
+                self.status_label.configure(text="Draft, refining...")
+            if self.auto_copy.get():
+                pyperclip.copy(text)
+            self.history_view.refresh()
+        METRICS.record("stop_to_text", time.perf_counter() - stopped_at)
+
+    def update_transcription(self, text, stopped_at=None):
+        # The engine has already saved the text to the history (replacing a draft, if one was shown)
+        with METRICS.span("ui.update_transcription"):
+            self.latest_text.delete("1.0", "end")
+            self.latest_text.insert("1.0", text)
+            if not self.engine.recording:
+                self.status_label.configure(text="")
+                self.indicator.set(0)
+            
+            if self.auto_copy.get():
+                pyperclip.copy(text)
+                
+            self.history_view.refresh()
+        if stopped_at is not None:
+            # The number users feel: from stopping the recording to text on screen
+            METRICS.record("stop_to_text", time.perf_counter() - stopped_at)
+        
+    def on_search_changed(self, event=None):
+        # Debounce so typing a word runs one query, not one per key
+        if self.search_after_id:
+            self.window.after_cancel(self.search_after_id)
+        self.search_after_id = self.window.after(150, self.apply_search)
+        
+    def apply_search(self):
+        self.search_after_id = None
+        query, since, until = parse_search(self.search_entry.get())
+        try:
+            self.history_view.set_filter(query, since, until)
+        except Exception as e:
+            logging.error(f"Error searching history: {str(e)}")
+        
+    def copy_text(self, text):
+        pyperclip.copy(text)
+        
+    def load_history(self):
+        try:
+            # Only the first screen of entries is read; older ones load as they scroll into view
+            self.history_view.refresh()
+            
+            # Set the latest transcription
+            latest = self.engine.history.latest()
+            if latest:
+                self.latest_text.delete("1.0", "end")
+                self.latest_text.insert("1.0", latest["text"])
+        except Exception as e:
+            logging.error(f"Error loading history: {str(e)}")
+            
+    def reset_ui(self):
+        try:
+            logging.debug("Resetting UI")
+            self.record_button.configure(
+                text="Start Recording",
+                state="normal",
+                fg_color="#2d5a88",
+                hover_color="#1d3a58"
+            )
+            self.status_label.configure(text="")
+            self.indicator.set(0)
+            self.timer_label.configure(text="0:00")
+        except Exception as e:
+            logging.error(f"Error in reset_ui: {str(e)}", exc_info=True)
+            
+    def on_closing(self):
+        try:
+            logging.debug("Application closing")
+            self.hotkeys.unregister()
+            self.engine.close()
+            logging.debug("Cleanup completed")
+            self.window.destroy()
+        except Exception as e:
+            logging.error(f"Error during application shutdown: {str(e)}", exc_info=True)
+            self.window.destroy()
+        
+    def update_timer(self):
+        if self.engine.recording and self.engine.start_time:
+            max_duration = self.engine.max_duration
+            elapsed = int(time.time() - self.engine.start_time)
+            if self.engine.recording_long:
+                # No limit to count down to; show the time recorded so far
+                hours, minutes = divmod(elapsed // 60, 60)
+                self.timer_label.configure(text=f"{hours}:{minutes:02d}:{elapsed % 60:02d}")
+                self.window.after(100, self.update_timer)
+                return
+            remaining = max_duration - elapsed
+            if remaining >= 0:
+                self.timer_label.configure(text=f"{remaining // 60}:{remaining % 60:02d}")
+                self.indicator.set(elapsed / max_duration)
+                self.window.after(100, self.update_timer)
+            
+    def hide_console(self):
+        """Hide the console window"""
+        if console_window.hide_console():
+            self.show_console.set(False)
+            
+    def show_console_window(self):
+        """Show the console window"""
+        console_window.show_console()
+            
+    def toggle_debug_logging(self):
+        set_log_level("DEBUG" if self.debug_logging.get() else self.settings["log_level"])
+        logging.info("Log level set to %s", logging.getLevelName(logging.getLogger().level))
+        
+    def toggle_console(self):
+        """Toggle console visibility based on checkbox state"""
+        if self.show_console.get():
+            self.show_console_window()
+        else:
+            self.hide_console()
+        
+    def run(self):
+        self.window.mainloop()
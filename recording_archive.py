@@ -0,0 +1,220 @@
+import os
+import mmap
+import json
+import zlib
+import struct
+import sqlite3
+import logging
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"WRA1"
+# magic, header length, audio length
+RECORD_HEADER = struct.Struct("<4sII")
+
+def encode_audio(chunks, sample_width: int = 2) -> bytes:
+    """Lossless compression for speech PCM, fed chunk by chunk: 16-bit samples
+    are stored as differences from the previous sample, which zlib packs far
+    better than the raw waveform"""
+    compressor = zlib.compressobj(6)
+    parts = []
+    previous = np.int16(0)
+    for chunk in chunks:
+        if sample_width == 2:
+            samples = np.frombuffer(chunk, dtype=np.int16)
+            if not len(samples):
+                continue
+            # Wrap-around arithmetic makes the deltas exactly reversible
+            data = np.diff(samples, prepend=previous).astype(np.int16).tobytes()
+            previous = samples[-1]
+        else:
+            data = bytes(chunk)
+        parts.append(compressor.compress(data))
+    parts.append(compressor.flush())
+    return b"".join(parts)
+
+def decode_audio(data, sample_width: int = 2) -> bytes:
+    raw = zlib.decompress(data)
+    if sample_width != 2:
+        return raw
+    return np.cumsum(np.frombuffer(raw, dtype=np.int16), dtype=np.int16).tobytes()
+
+class RecordingArchive:
+    """Recordings and their transcripts appended to a few large segment files
+    instead of thousands of loose WAV/TXT pairs.
+
+    Each record is self-describing (a JSON header with the metadata and
+    transcript, then the compressed audio). An SQLite index maps recording
+    ids to (segment, offset), so a read maps the segment and decodes one
+    record without scanning. Segments roll over at segment_bytes; compact()
+    rewrites sealed segments without the deleted records.
+    """
+
+    def __init__(self, directory: str = os.path.join("recordings", "archive"),
+                 segment_bytes: int = 256 * 1024 * 1024):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.maps = {}
+        self.conn = sqlite3.connect(os.path.join(directory, "index.db"), check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS recordings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                header_bytes INTEGER NOT NULL,
+                audio_bytes INTEGER NOT NULL,
+                duration REAL NOT NULL,
+                transcript TEXT,
+                deleted INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS recordings_segment ON recordings(segment);
+        """)
+        self.conn.commit()
+        row = self.conn.execute("SELECT MAX(segment) FROM recordings").fetchone()
+        self.segment = row[0] or 1
+
+    def segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"archive_{segment:05d}.wra")
+
+    def add(self, buffer, transcription: Optional[str], rate: int = 16000, channels: int = 1,
+            sample_width: int = 2, timestamp: Optional[str] = None) -> int:
+        """Append a recording (a CaptureBuffer/SpillBuffer or PCM bytes); returns its id"""
+        timestamp = timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        chunks = buffer.chunks() if hasattr(buffer, "chunks") else [buffer]
+        audio = encode_audio(chunks, sample_width)
+        duration = (len(buffer) / (rate * channels * sample_width))
+        header = json.dumps({
+            "timestamp": timestamp,
+            "rate": rate,
+            "channels": channels,
+            "sample_width": sample_width,
+            "codec": "delta16-zlib" if sample_width == 2 else "zlib",
+            "transcript": transcription
+        }).encode("utf-8")
+        record = RECORD_HEADER.pack(MAGIC, len(header), len(audio)) + header + audio
+
+        with self.lock:
+            path = self.segment_path(self.segment)
+            if os.path.exists(path) and os.path.getsize(path) + len(record) > self.segment_bytes:
+                self.segment += 1
+                path = self.segment_path(self.segment)
+            with open(path, "ab") as f:
+                offset = f.tell()
+                f.write(record)
+            cursor = self.conn.execute(
+                "INSERT INTO recordings (timestamp, segment, offset, header_bytes, audio_bytes, duration, transcript) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (timestamp, self.segment, offset, len(header), len(audio), duration, transcription)
+            )
+            self.conn.commit()
+            # A cached map of this segment no longer covers the new record
+            self._unmap(self.segment)
+            logging.debug("Archived recording %d (%.1fs, %d bytes) in segment %d",
+                          cursor.lastrowid, duration, len(record), self.segment)
+            return cursor.lastrowid
+
+    def _map(self, segment: int) -> mmap.mmap:
+        if segment not in self.maps:
+            with open(self.segment_path(segment), "rb") as f:
+                self.maps[segment] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.maps[segment]
+
+    def _unmap(self, segment: int):
+        mapped = self.maps.pop(segment, None)
+        if mapped:
+            mapped.close()
+
+    def read(self, recording_id: int) -> Tuple[Dict, bytes]:
+        """(metadata, PCM) of one recording, straight from its offset"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT * FROM recordings WHERE id = ? AND deleted = 0", (recording_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"No archived recording {recording_id}")
+            mapped = self._map(row["segment"])
+            start = row["offset"] + RECORD_HEADER.size
+            header = json.loads(mapped[start:start + row["header_bytes"]])
+            start += row["header_bytes"]
+            audio = mapped[start:start + row["audio_bytes"]]
+        header["id"] = recording_id
+        return header, decode_audio(audio, header["sample_width"])
+
+    def list(self, limit: int = 50, offset: int = 0) -> List[Dict]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, timestamp, duration, transcript FROM recordings WHERE deleted = 0 "
+                "ORDER BY id DESC LIMIT ? OFFSET ?", (limit, offset)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def export_wav(self, recording_id: int, path: str):
+        import wave
+        header, pcm = self.read(recording_id)
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(header["channels"])
+            wf.setsampwidth(header["sample_width"])
+            wf.setframerate(header["rate"])
+            wf.writeframes(pcm)
+
+    def delete(self, recording_id: int):
+        """Drop a recording from the index; its bytes are reclaimed by compact()"""
+        with self.lock:
+            self.conn.execute("UPDATE recordings SET deleted = 1 WHERE id = ?", (recording_id,))
+            self.conn.commit()
+
+    def compact(self, min_dead_ratio: float = 0.25) -> int:
+        """Rewrite sealed segments in which at least min_dead_ratio of the
+        bytes belong to deleted records, then drop the deleted rows. The
+        segment being appended to is left alone. Returns bytes reclaimed."""
+        reclaimed = 0
+        with self.lock:
+            segments = [row[0] for row in self.conn.execute(
+                "SELECT DISTINCT segment FROM recordings WHERE segment < ?", (self.segment,)
+            )]
+            for segment in segments:
+                path = self.segment_path(segment)
+                if not os.path.exists(path):
+                    continue
+                size = os.path.getsize(path)
+                rows = self.conn.execute(
+                    "SELECT id, offset, header_bytes, audio_bytes FROM recordings "
+                    "WHERE segment = ? AND deleted = 0 ORDER BY offset", (segment,)
+                ).fetchall()
+                live = sum(RECORD_HEADER.size + r["header_bytes"] + r["audio_bytes"] for r in rows)
+                if size == 0 or (size - live) / size < min_dead_ratio:
+                    continue
+                self._unmap(segment)
+                temp_path = path + ".compact"
+                moves = []
+                with open(path, "rb") as source, open(temp_path, "wb") as target:
+                    mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+                    for r in rows:
+                        length = RECORD_HEADER.size + r["header_bytes"] + r["audio_bytes"]
+                        moves.append((target.tell(), r["id"]))
+                        target.write(mapped[r["offset"]:r["offset"] + length])
+                    if mapped:
+                        mapped.close()
+                os.replace(temp_path, path)
+                self.conn.executemany("UPDATE recordings SET offset = ? WHERE id = ?", moves)
+                self.conn.execute("DELETE FROM recordings WHERE segment = ? AND deleted = 1", (segment,))
+                self.conn.commit()
+                reclaimed += size - live
+                if not rows:
+                    os.remove(path)
+                logging.info("Compacted archive segment %d, reclaimed %d bytes", segment, size - live)
+        return reclaimed
+
+    def close(self):
+        with self.lock:
+            for segment in list(self.maps):
+                self._unmap(segment)
+            self.conn.close()
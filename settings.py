@@ -0,0 +1,96 @@
+import os
+import json
+import logging
+
+SETTINGS_FILE = "settings.json"
+
+DEFAULT_SETTINGS = {
+    # "server" keeps a whisper-server process warm, "cli" spawns whisper-cli per clip
+    "backend": "server",
+    "whisper_model": "models/ggml-base.en.bin",  # relative to whisper.cpp/
+    # "auto": pick a model per clip, the most accurate one whose measured speed fits
+    # latency_budget_base + latency_budget_ratio x audio seconds
+    "model_selection": "fixed",
+    "models": [],                    # candidates for "auto"; empty: every ggml model in whisper.cpp/models
+    "latency_budget_base": 1.5,
+    "latency_budget_ratio": 0.25,
+    "max_warm_models": 2,            # the most used models kept loaded (server) or cached (cli)
+    # Two-pass transcription: a fast model's draft is shown first and replaced by whisper_model's
+    # text when it is done, e.g. "models/ggml-tiny.en-q5_1.bin"; empty disables
+    "draft_model": "",
+    "whisper_threads": 4,
+    # Pick threads/beam size by timing a calibration clip once per machine (cached in whisper_tuning.json)
+    "auto_tune": True,
+    "tuning_max_wer": 0.05,          # accuracy target against the most thorough setting
+    "calibration_clip": "",          # defaults to whisper.cpp/samples/jfk.wav
+    "server_port": 0,            # 0 picks a free local port
+    "server_startup_timeout": 60,
+    # Reuse transcripts of identical audio (same model and decode settings) from recordings/transcript_cache.db
+    "transcript_cache": True,
+    "transcript_cache_mb": 50,
+    # Keep WAV/transcript files in recordings/; otherwise audio is transcribed in memory
+    "archive_recordings": False,
+    # "files": a WAV and TXT per recording; "container": compressed audio, transcript and
+    # metadata appended to indexed segment files in recordings/archive/
+    "archive_format": "files",
+    "archive_segment_mb": 256,
+    # Recordings stop here unless long_recording is on
+    "max_recording_seconds": 60,
+    # No length limit: audio spills to a memory-mapped temp file and segments are transcribed in parallel
+    "long_recording": False,
+    "long_recording_workers": 0,     # 0: cores / whisper_threads for the cli backend, 1 for the server
+    # Finished recordings wait in a queue; more workers transcribe clips in parallel
+    "transcription_workers": 1,
+    # A whisper run is killed (and a stuck server restarted) after base + ratio x audio seconds; 0 and 0 disable
+    "transcription_deadline_base": 30.0,
+    "transcription_deadline_ratio": 3.0,
+    "hotkey": "ctrl+shift+c",
+    "hotkey_mode": "toggle",          # "hold": push-to-talk, records while the hotkey is held
+    "hotkey_poll_ms": 10,             # how often the window picks up hotkey events
+    "cancel_hotkey": "ctrl+shift+x",  # cancels queued and running transcriptions
+    # Keep the input stream open in callback mode so starting a recording is a flag flip
+    "warm_stream": True,
+    # Audio kept from before the hotkey; a value above 0 keeps the input stream open
+    "preroll_seconds": 0.5,
+    # Transcribe finished segments while still recording
+    "incremental_transcription": True,
+    "segment_min_seconds": 8.0,      # cut at the first pause after this long
+    "segment_max_seconds": 20.0,     # force a cut (with overlap) after this long
+    "segment_overlap_seconds": 1.0,
+    "segment_silence_seconds": 0.5,  # pause length that counts as a cut point
+    "silence_threshold_db": -40.0,   # dBFS below which audio counts as silence
+    # Voice activity detection: cut silence before transcribing, skip clips without speech
+    "vad_enabled": True,
+    "vad_threshold_db": -40.0,
+    "vad_padding_seconds": 0.2,      # context kept around speech
+    "vad_min_silence_seconds": 0.6,  # shorter pauses are left in
+    "vad_min_speech_seconds": 0.2,   # less speech than this counts as an empty clip
+    # Rolling p50/p95/p99 of each pipeline step, written periodically; empty path disables
+    "metrics_json": "recordings/metrics.json",
+    "metrics_prometheus": "",        # e.g. a node_exporter textfile directory/whisper_recorder.prom
+    "metrics_export_seconds": 60,
+    # Hide the console window shortly after the GUI starts (Windows only)
+    "hide_console": True,
+    # Logging goes through a background thread; the file rotates at log_max_bytes
+    "log_file": "app.log",
+    "log_level": "INFO",             # DEBUG logs every recording step (also switchable in the UI)
+    "log_max_bytes": 5 * 1024 * 1024,
+    "log_backup_count": 3,
+}
+
+def load_settings(path: str = SETTINGS_FILE) -> dict:
+    """Load settings.json on top of the defaults"""
+    settings = dict(DEFAULT_SETTINGS)
+    if not os.path.exists(path):
+        return settings
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            overrides = json.load(f)
+        for key, value in overrides.items():
+            if key not in DEFAULT_SETTINGS:
+                logging.warning(f"Ignoring unknown setting '{key}' in {path}")
+                continue
+            settings[key] = value
+    except Exception as e:
+        logging.error(f"Error loading settings from {path}: {str(e)}")
+    return settings
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+from audio_processing import trim_silence
+
+RATE = 16000
+
+def tone(seconds: float) -> bytes:
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (np.sin(2 * np.pi * 440 * t) * 8000).astype(np.int16).tobytes()
+
+def silence(seconds: float) -> bytes:
+    return bytes(int(RATE * seconds) * 2)
+
+@pytest.mark.parametrize("seconds", [0.21, 0.25, 0.35, 0.41, 0.43])
+def test_short_speech_is_kept(seconds):
+    # Fewer frames than the padding kernel used to break the speech mask
+    trimmed, removed = trim_silence(tone(seconds), rate=RATE)
+    assert len(trimmed) == len(tone(seconds))
+    assert removed == 0
+
+def test_short_clip_without_enough_speech_is_empty():
+    trimmed, removed = trim_silence(tone(0.1) + silence(0.2), rate=RATE)
+    assert trimmed == b""
+    assert removed == pytest.approx(0.3)
+
+def test_leading_and_trailing_silence_is_cut():
+    trimmed, removed = trim_silence(silence(1.0) + tone(0.5) + silence(1.0), rate=RATE)
+    # 0.2s of padding stays on each side of the speech
+    assert len(trimmed) / 2 / RATE == pytest.approx(0.9, abs=0.02)
+    assert removed == pytest.approx(1.6, abs=0.02)
@@ -0,0 +1,31 @@
+import pytest
+from history_store import HistoryStore, parse_search
+
+@pytest.fixture
+def store(tmp_path):
+    history = HistoryStore(str(tmp_path / "history.db"))
+    yield history
+    history.close()
+
+def search(store, text):
+    query, since, until = parse_search(text)
+    return [entry["text"] for entry in store.recent(query=query, since=since, until=until)]
+
+def test_hyphenated_term_matches(store):
+    store.add("Send the follow-up e-mail today")
+    store.add("Nothing to see here")
+    assert search(store, "follow-up") == ["Send the follow-up e-mail today"]
+    assert search(store, "e-mail") == ["Send the follow-up e-mail today"]
+    assert search(store, "e-ma*") == ["Send the follow-up e-mail today"]
+
+def test_punctuation_inside_words_matches(store):
+    store.add("Version 3.5 ships in the U.S. first")
+    assert search(store, "3.5") == ["Version 3.5 ships in the U.S. first"]
+    assert search(store, "U.S.") == ["Version 3.5 ships in the U.S. first"]
+    assert search(store, "35") == []
+
+def test_parse_search_terms_and_dates():
+    assert parse_search('"exact phrase" word* from:2024-01-01 to:2024-01-31') == (
+        '"exact phrase" "word"*', "2024-01-01", "2024-01-31 23:59:59"
+    )
+    assert parse_search("follow-up") == ('"follow up"', None, None)
@@ -0,0 +1,90 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+from metrics import METRICS
+
+def cache_key(audio, model_path: str, params: Dict) -> str:
+    """Content address of a transcript: the audio bytes plus everything that
+    changes what whisper makes of them"""
+    digest = hashlib.sha256()
+    digest.update(audio)
+    size = os.path.getsize(model_path) if os.path.exists(model_path) else 0
+    digest.update(f"|{os.path.basename(model_path)}|{size}".encode("utf-8"))
+    digest.update("|".join(f"{k}={v}" for k, v in sorted(params.items())).encode("utf-8"))
+    return digest.hexdigest()
+
+class TranscriptCache:
+    """Transcripts keyed by cache_key(), in SQLite, evicting the least recently
+    used entries once the stored text exceeds max_bytes"""
+
+    def __init__(self, path: str = os.path.join("recordings", "transcript_cache.db"),
+                 max_bytes: int = 50 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transcripts (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS transcripts_last_used ON transcripts(last_used);
+        """)
+        self.size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+        self.conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT text FROM transcripts WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                METRICS.increment("transcript_cache.miss")
+                return None
+            self.conn.execute("UPDATE transcripts SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            self.hits += 1
+            METRICS.increment("transcript_cache.hit")
+            return row[0]
+
+    def put(self, key: str, text: str):
+        size = len(key) + len(text.encode("utf-8"))
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM transcripts WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO transcripts (key, text, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, text, size, time.time())
+            )
+            self.size += size - (old[0] if old else 0)
+            evicted = 0
+            while self.size > self.max_bytes:
+                oldest = self.conn.execute(
+                    "SELECT key, size FROM transcripts ORDER BY last_used LIMIT 1"
+                ).fetchone()
+                if oldest is None:
+                    break
+                self.conn.execute("DELETE FROM transcripts WHERE key = ?", (oldest[0],))
+                self.size -= oldest[1]
+                evicted += 1
+            self.conn.commit()
+        if evicted:
+            METRICS.increment("transcript_cache.evicted", evicted)
+            logging.debug("Transcript cache evicted %d entries", evicted)
+
+    def stats(self) -> Dict:
+        with self.lock:
+            entries = self.conn.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": self.size}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
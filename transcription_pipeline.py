@@ -0,0 +1,220 @@
+import os
+import time
+import wave
+import logging
+from datetime import datetime
+from typing import Optional
+from audio_processing import SegmentSplitter, trim_silence
+from incremental_transcriber import IncrementalTranscription
+from metrics import METRICS
+from whisper_cpp_wrapper import TranscriptionInterrupted
+
+class TranscriptionPipeline:
+    """Turns a finished recording into text: silence trimming, whisper and
+    archiving. Has no GUI or audio-device dependencies, so it can be driven
+    headless (see benchmarks/run_benchmark.py)."""
+
+    def __init__(self, transcriber, settings: dict, recordings_dir: str = "recordings",
+                 rate: int = 16000, channels: int = 1, sample_width: int = 2, archive=None,
+                 drafter=None):
+        self.transcriber = transcriber
+        # A faster transcriber whose text is shown while `transcriber` is still decoding
+        self.drafter = drafter
+        # A RecordingArchive to append to instead of writing loose WAV/TXT files
+        self.archive = archive
+        self.settings = settings
+        self.recordings_dir = recordings_dir
+        self.rate = rate
+        self.channels = channels
+        self.sample_width = sample_width
+
+    def start_incremental(self, long_recording: bool = False, cancel_event=None):
+        """Splitter and background transcription for a new recording, or
+        (None, None) when incremental transcription is off. Long recordings
+        are always segmented, and their segments decoded in parallel.
+        Setting cancel_event kills the decodes in flight. Two-pass mode
+        (a drafter) decodes ordinary recordings whole, after they stop."""
+        if not long_recording and (self.drafter or not self.settings["incremental_transcription"]):
+            return None, None
+        splitter = SegmentSplitter(
+            self.rate,
+            sample_width=self.sample_width,
+            channels=self.channels,
+            min_seconds=self.settings["segment_min_seconds"],
+            max_seconds=self.settings["segment_max_seconds"],
+            overlap_seconds=self.settings["segment_overlap_seconds"],
+            silence_seconds=self.settings["segment_silence_seconds"],
+            silence_db=self.settings["silence_threshold_db"]
+        )
+        incremental = IncrementalTranscription(
+            self.transcriber,
+            rate=self.rate,
+            channels=self.channels,
+            sample_width=self.sample_width,
+            preprocess=self.prepare_audio,
+            workers=self.segment_workers() if long_recording else 1,
+            cancel_event=cancel_event
+        )
+        return splitter, incremental
+
+    def segment_workers(self) -> int:
+        workers = self.settings["long_recording_workers"]
+        if workers:
+            return workers
+        if self.transcriber.backend == "server":
+            # The resident server decodes one request at a time
+            return 1
+        # Enough whisper-cli processes to keep every core busy
+        return max(1, (os.cpu_count() or 4) // max(1, self.transcriber.threads))
+
+    def prepare_audio(self, audio):
+        """Cut silence before the audio goes to whisper; empty when there is no speech"""
+        if not self.settings["vad_enabled"]:
+            return audio
+        trimmed, removed = trim_silence(
+            audio,
+            rate=self.rate,
+            threshold_db=self.settings["vad_threshold_db"],
+            padding_seconds=self.settings["vad_padding_seconds"],
+            min_silence_seconds=self.settings["vad_min_silence_seconds"],
+            min_speech_seconds=self.settings["vad_min_speech_seconds"]
+        )
+        total = len(audio) / (self.rate * self.channels * self.sample_width)
+        if not trimmed:
+            logging.info("VAD found no speech in %.1fs of audio", total)
+        else:
+            logging.info("VAD removed %.1fs of silence from %.1fs of audio", removed, total)
+        return trimmed
+
+    def save_and_transcribe(self, buffer, splitter=None, incremental=None, archive=False,
+                            timings: Optional[dict] = None, on_partial=None,
+                            cancel_event=None, on_draft=None) -> Optional[str]:
+        """Transcribe a finished CaptureBuffer. Stage durations in seconds are
+        added to `timings` when a dict is passed, and always recorded in METRICS.
+        on_partial(text, fraction) follows the decode as whisper streams it.
+        With a drafter, on_draft(text) gets the draft before the full decode starts.
+        Raises TranscriptionInterrupted on a deadline or once cancel_event is set."""
+        if timings is None:
+            timings = {}
+        began = time.perf_counter()
+        try:
+            return self._save_and_transcribe(buffer, splitter, incremental, archive, timings,
+                                             on_partial, cancel_event, on_draft)
+        finally:
+            METRICS.record_all("stage", timings)
+            METRICS.record("pipeline.save_and_transcribe", time.perf_counter() - began)
+
+    def _save_and_transcribe(self, buffer, splitter, incremental, archive, timings: dict,
+                             on_partial=None, cancel_event=None, on_draft=None) -> Optional[str]:
+        try:
+            transcription = self._transcribe_recording(buffer, splitter, incremental, timings,
+                                                       on_partial, cancel_event, on_draft)
+        except TranscriptionInterrupted:
+            if archive:
+                # Keep the audio of a recording whose transcription was killed
+                self.archive_recording(buffer, None)
+            raise
+
+        if archive:
+            start = time.perf_counter()
+            self.archive_recording(buffer, transcription)
+            self._timed(timings, "wav_write", start)
+
+        if transcription:
+            logging.info("Successfully transcribed recording")
+        else:
+            logging.error("Transcription failed or returned empty")
+        return transcription
+
+    def _transcribe_recording(self, buffer, splitter, incremental, timings: dict,
+                              on_partial, cancel_event, on_draft=None) -> Optional[str]:
+        if incremental:
+            # Earlier segments were decoded while recording; only the tail is left
+            tail_start, tail_overlapped = splitter.tail()
+            logging.debug("Transcribing tail from byte %d of %d", tail_start, len(buffer))
+            transcription = incremental.finish(
+                buffer.getbuffer(tail_start),
+                tail_overlapped,
+                on_partial
+            )
+        else:
+            start = time.perf_counter()
+            # A view of the capture buffer; the audio is never copied on its way to whisper
+            audio = buffer.getbuffer()
+            self._timed(timings, "buffer", start)
+            start = time.perf_counter()
+            speech = self.prepare_audio(audio)
+            self._timed(timings, "vad", start)
+            if speech and self.drafter and on_draft:
+                self._draft(speech, on_draft, cancel_event)
+            if speech:
+                # Hand the PCM straight to whisper; nothing is written to disk
+                logging.debug("Starting in-memory transcription")
+                transcription = self.transcriber.transcribe_pcm(
+                    speech,
+                    rate=self.rate,
+                    channels=self.channels,
+                    sample_width=self.sample_width,
+                    timings=timings,
+                    on_partial=on_partial,
+                    cancel=cancel_event
+                )
+            else:
+                logging.info("Skipping transcription, no speech detected")
+                transcription = None
+        return transcription
+
+    def _draft(self, speech, on_draft, cancel_event):
+        """First pass with the drafter. A draft that fails or overruns its
+        deadline is skipped; the full pass runs either way."""
+        start = time.perf_counter()
+        try:
+            draft = self.drafter.transcribe_pcm(
+                speech,
+                rate=self.rate,
+                channels=self.channels,
+                sample_width=self.sample_width,
+                cancel=cancel_event
+            )
+        except TranscriptionInterrupted as e:
+            if e.reason == "cancelled":
+                raise
+            logging.warning("Skipping draft: %s", str(e))
+            return
+        finally:
+            METRICS.record("pipeline.draft", time.perf_counter() - start)
+        if draft:
+            on_draft(draft)
+
+    def archive_recording(self, buffer, transcription):
+        if self.archive:
+            self.archive.add(
+                buffer,
+                transcription,
+                rate=self.rate,
+                channels=self.channels,
+                sample_width=self.sample_width
+            )
+            return
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = os.path.join(self.recordings_dir, f"recording_{timestamp}.wav")
+        txt_filename = os.path.join(self.recordings_dir, f"transcript_{timestamp}.txt")
+
+        logging.debug("Saving WAV file: %s", filename)
+        wf = wave.open(filename, 'wb')
+        wf.setnchannels(self.channels)
+        wf.setsampwidth(self.sample_width)
+        wf.setframerate(self.rate)
+        # Written region by region, so a long recording is never held in memory whole
+        for chunk in buffer.chunks():
+            wf.writeframes(chunk)
+        wf.close()
+
+        if transcription:
+            logging.debug("Saving transcript")
+            with open(txt_filename, 'w', encoding='utf-8') as f:
+                f.write(transcription)
+
+    @staticmethod
+    def _timed(timings: dict, stage: str, start: float):
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
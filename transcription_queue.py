@@ -0,0 +1,163 @@
+import time
+import queue
+import threading
+import itertools
+import logging
+from collections import deque
+from typing import Callable, List, Optional
+from metrics import METRICS
+
+class TranscriptionJob:
+    QUEUED = "queued"
+    TRANSCRIBING = "transcribing"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, job_id: int, work: Callable[[], Optional[str]],
+                 cancel_event: Optional[threading.Event] = None, draft: Optional[dict] = None,
+                 on_skip: Optional[Callable[[], None]] = None):
+        self.id = job_id
+        self.work = work
+        self.state = self.QUEUED
+        self.result = None
+        self.error = None
+        # Set to cancel; the work is expected to watch it once started
+        self.cancel_event = cancel_event or threading.Event()
+        # Filled in by the work when it shows a first-pass draft ahead of the result
+        self.draft = draft if draft is not None else {}
+        # Run instead of the work when the job is cancelled before it starts, to free what it holds
+        self.on_skip = on_skip
+        # perf_counter() at submission; for a recording this is when it was stopped
+        self.queued_at = time.perf_counter()
+
+class TranscriptionQueue:
+    """Runs transcription jobs on a pool of workers and hands the results
+    back in submission (capture) order, whatever order they finish in.
+
+    on_result(job) and on_change() are called from worker threads.
+    """
+
+    def __init__(self, workers: int = 1, on_result: Optional[Callable[[TranscriptionJob], None]] = None,
+                 on_change: Optional[Callable[[], None]] = None):
+        self.on_result = on_result
+        self.on_change = on_change
+        self.jobs = queue.Queue()
+        self.active = []
+        self.finished = {}
+        self.next_delivery = 0
+        # Jobs whose turn has come, in capture order, waiting for on_result
+        self.ready = deque()
+        self.submitted = 0
+        self.delivered = 0
+        self.ids = itertools.count()
+        self.lock = threading.Lock()
+        self.all_delivered = threading.Condition(self.lock)
+        # Held by the one worker delivering; on_result runs outside self.lock
+        self.delivery_lock = threading.Lock()
+        self.workers = [
+            threading.Thread(target=self._work, daemon=True, name=f"transcriber-{i}")
+            for i in range(max(1, workers))
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def submit(self, work: Callable[[], Optional[str]],
+               cancel_event: Optional[threading.Event] = None,
+               draft: Optional[dict] = None,
+               on_skip: Optional[Callable[[], None]] = None) -> TranscriptionJob:
+        with self.lock:
+            job = TranscriptionJob(next(self.ids), work, cancel_event, draft, on_skip)
+            self.active.append(job)
+            self.submitted += 1
+        self.jobs.put(job)
+        self._changed()
+        return job
+
+    def pending(self) -> List[TranscriptionJob]:
+        """Jobs whose results have not been delivered yet, oldest first"""
+        with self.lock:
+            return list(self.active)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every job submitted so far has been delivered (its
+        on_result returned); False if the timeout ran out first"""
+        with self.all_delivered:
+            return self.all_delivered.wait_for(lambda: self.delivered >= self.submitted, timeout)
+
+    def cancel(self) -> int:
+        """Cancel every job not yet delivered; returns how many"""
+        jobs = self.pending()
+        for job in jobs:
+            job.cancel_event.set()
+        if jobs:
+            logging.info("Cancelling %d transcription job(s)", len(jobs))
+        return len(jobs)
+
+    def stop(self):
+        for _ in self.workers:
+            self.jobs.put(None)
+
+    def _changed(self):
+        if self.on_change:
+            try:
+                self.on_change()
+            except Exception as e:
+                logging.error(f"Error in queue change callback: {str(e)}", exc_info=True)
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            if job.cancel_event.is_set():
+                job.state = TranscriptionJob.CANCELLED
+                if job.on_skip:
+                    try:
+                        job.on_skip()
+                    except Exception as e:
+                        logging.error(f"Error cleaning up cancelled job {job.id}: {str(e)}", exc_info=True)
+                self._deliver(job)
+                continue
+            job.state = TranscriptionJob.TRANSCRIBING
+            METRICS.record("queue.wait", time.perf_counter() - job.queued_at)
+            self._changed()
+            try:
+                with METRICS.span("queue.job"):
+                    job.result = job.work()
+                job.state = TranscriptionJob.DONE
+            except Exception as e:
+                job.error = str(e)
+                if job.cancel_event.is_set():
+                    logging.info("Transcription job %d cancelled", job.id)
+                    job.state = TranscriptionJob.CANCELLED
+                else:
+                    logging.error(f"Error in transcription job {job.id}: {str(e)}", exc_info=True)
+                    job.state = TranscriptionJob.FAILED
+            self._deliver(job)
+
+    def _deliver(self, job: TranscriptionJob):
+        with self.lock:
+            self.finished[job.id] = job
+            while self.next_delivery in self.finished:
+                self.ready.append(self.finished.pop(self.next_delivery))
+                self.next_delivery += 1
+        # on_result may wait for the front end's thread, which may itself be
+        # waiting for self.lock in submit() or pending(); so it is called
+        # without it, one worker at a time to keep the capture order
+        with self.delivery_lock:
+            while True:
+                with self.lock:
+                    if not self.ready:
+                        break
+                    done = self.ready.popleft()
+                    self.active.remove(done)
+                if self.on_result:
+                    try:
+                        self.on_result(done)
+                    except Exception as e:
+                        logging.error(f"Error delivering job {done.id}: {str(e)}", exc_info=True)
+                with self.lock:
+                    self.delivered += 1
+                    self.all_delivered.notify_all()
+        self._changed()
@@ -1,69 +1,611 @@
+import io
 import os
+import re
+import json
+import wave
+import uuid
+import codecs
+import socket
+import threading
+import time
 import subprocess
 import logging
-from typing import Optional
+import urllib.request
+import urllib.error
+from typing import Callable, List, Optional, Tuple, Union
+from metrics import METRICS
+from transcript_cache import TranscriptCache, cache_key
+
+Command = Union[str, List[str]]
+# on_partial(text so far, fraction decoded), called as whisper produces segments
+PartialCallback = Callable[[str, float], None]
+
+class TranscriptionInterrupted(Exception):
+    """A whisper run was killed, either because it overran its deadline
+    (reason "timeout") or because it was cancelled (reason "cancelled")"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+class _Watchdog:
+    """Calls kill() once `timeout` seconds have passed or `cancel` is set,
+    unless stop() comes first. reason says which one fired."""
+
+    poll_seconds = 0.05
+
+    def __init__(self, timeout: Optional[float], cancel: Optional[threading.Event],
+                 kill: Callable[[], None]):
+        self.timeout = timeout
+        self.cancel = cancel
+        self.kill = kill
+        self.reason = None
+        self.started = time.perf_counter()
+        self.done = threading.Event()
+        if timeout or cancel is not None:
+            threading.Thread(target=self._watch, daemon=True, name="whisper-watchdog").start()
+
+    def _watch(self):
+        while not self.done.wait(self.poll_seconds):
+            if self.cancel is not None and self.cancel.is_set():
+                self.reason = "cancelled"
+            elif self.timeout and time.perf_counter() - self.started >= self.timeout:
+                self.reason = "timeout"
+            else:
+                continue
+            logging.warning("Killing Whisper run after %.1fs: %s", time.perf_counter() - self.started, self.reason)
+            try:
+                self.kill()
+            except Exception as e:
+                logging.error(f"Error killing Whisper: {str(e)}")
+            return
+
+    def stop(self) -> float:
+        """Stop watching; returns the elapsed seconds"""
+        self.done.set()
+        return time.perf_counter() - self.started
+
+    def check(self):
+        """Raise TranscriptionInterrupted if the watchdog fired"""
+        if self.reason == "timeout":
+            METRICS.increment("whisper.deadline_exceeded")
+            raise TranscriptionInterrupted("timeout", f"Whisper did not finish within its {self.timeout:.1f}s deadline")
+        if self.reason == "cancelled":
+            METRICS.increment("whisper.cancelled")
+            raise TranscriptionInterrupted("cancelled", "Transcription cancelled")
+
+    def finish(self):
+        """stop(), then count runs that used over half their deadline (the tail
+        that is about to start hitting it) and raise if the watchdog fired"""
+        elapsed = self.stop()
+        self.check()
+        if self.timeout and elapsed > self.timeout / 2:
+            METRICS.increment("whisper.deadline_over_half")
+
+def _wav_seconds(path: str) -> float:
+    try:
+        with wave.open(path, "rb") as wf:
+            return wf.getnframes() / wf.getframerate()
+    except Exception:
+        return 0.0
+
+def _as_command(executable: Command) -> List[str]:
+    # A list lets a stand-in script be used, e.g. [sys.executable, "fake_whisper.py"]
+    if isinstance(executable, (list, tuple)):
+        return list(executable)
+    return [executable]
+
+def pcm_to_wav(pcm: bytes, rate: int = 16000, channels: int = 1, sample_width: int = 2) -> bytes:
+    """Wrap raw PCM in an in-memory WAV container"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(sample_width)
+        wf.setframerate(rate)
+        wf.writeframes(pcm)
+    return buffer.getvalue()
+
+def _add_timing(timings: Optional[dict], stage: str, seconds: float):
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+_TIMING_LINE = re.compile(r"whisper_print_timings:\s+(\w+) time =\s+([\d.]+) ms")
+_PROGRESS_LINE = re.compile(r"progress =\s*(\d+)%")
+
+def _add_cli_timings(timings: dict, stderr: bytes, wall: float):
+    """Split a whisper-cli run into spawn, model load and decode using the
+    timings whisper prints on exit"""
+    reported = {
+        name: float(ms) / 1000
+        for name, ms in _TIMING_LINE.findall(stderr.decode("utf-8", errors="replace"))
+    }
+    if "total" not in reported:
+        _add_timing(timings, "decode", wall)
+        return
+    load = reported.get("load", 0.0)
+    _add_timing(timings, "spawn", max(0.0, wall - reported["total"]))
+    _add_timing(timings, "model_load", load)
+    _add_timing(timings, "decode", max(0.0, reported["total"] - load))
+
+def _free_port(host: str) -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+class WhisperServer:
+    """Resident whisper-server process that keeps the model loaded between clips"""
+
+    def __init__(self, executable: Command, model_path: str, threads: int = 4,
+                 language: str = "en", host: str = "127.0.0.1", port: int = 0,
+                 startup_timeout: float = 60.0):
+        self.command = _as_command(executable)
+        self.model_path = model_path
+        self.threads = threads
+        self.language = language
+        self.host = host
+        self.requested_port = port
+        self.port = None
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.restarts = 0
+        self.decode_params = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def is_running(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        self.port = self.requested_port or _free_port(self.host)
+        cmd = self.command + [
+            "-m", self.model_path,
+            "-l", self.language,
+            "-t", str(self.threads),
+            "--host", self.host,
+            "--port", str(self.port)
+        ]
+        logging.info(f"Starting Whisper server: {' '.join(cmd)}")
+        self.process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        )
+        self._wait_ready()
+
+    def _wait_ready(self):
+        deadline = time.time() + self.startup_timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Whisper server exited during startup with code {self.process.returncode}")
+            try:
+                with urllib.request.urlopen(self.url + "/health", timeout=1) as response:
+                    if response.status == 200:
+                        logging.info(f"Whisper server ready on {self.url}")
+                        return
+            except urllib.error.HTTPError as e:
+                # Older servers have no /health route but only listen once the model is loaded
+                if e.code == 404:
+                    logging.info(f"Whisper server ready on {self.url}")
+                    return
+            except (urllib.error.URLError, OSError):
+                pass
+            time.sleep(0.1)
+        self.stop()
+        raise TimeoutError(f"Whisper server did not become ready within {self.startup_timeout}s")
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+    def ensure_running(self):
+        if self.is_running():
+            return
+        if self.process is not None:
+            logging.warning(f"Whisper server died with code {self.process.returncode}, restarting")
+            self.restarts += 1
+            self.process = None
+        self.start()
+
+    def kill(self):
+        """Kill a stuck server without waiting for the request lock; the
+        request in flight fails and the next one restarts the process"""
+        process = self.process
+        if process is not None and process.poll() is None:
+            process.kill()
+            METRICS.increment("whisper.backend_killed")
+
+    def restart(self):
+        try:
+            with self._lock:
+                self.ensure_running()
+        except Exception as e:
+            logging.error(f"Error restarting Whisper server: {str(e)}")
+
+    def inference(self, wav_data: bytes, filename: str = "audio.wav") -> str:
+        boundary = uuid.uuid4().hex
+        fields = {"response_format": "json", "language": self.language, **self.decode_params}
+        body = bytearray()
+        for name, value in fields.items():
+            body += (f"--{boundary}\r\n"
+                     f"Content-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+                     f"{value}\r\n").encode("utf-8")
+        body += (f"--{boundary}\r\n"
+                 f"Content-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+                 f"Content-Type: audio/wav\r\n\r\n").encode("utf-8")
+        body += wav_data
+        body += f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+        request = urllib.request.Request(
+            self.url + "/inference",
+            data=bytes(body),
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request) as response:
+            result = json.loads(response.read().decode("utf-8"))
+        if "error" in result:
+            raise RuntimeError(f"Whisper server error: {result['error']}")
+        return result.get("text", "").strip()
+
+    def transcribe(self, wav_data: bytes, filename: str = "audio.wav", timeout: Optional[float] = None,
+                   cancel: Optional[threading.Event] = None) -> str:
+        """Decode one clip. Past `timeout` seconds or once `cancel` is set the
+        server is killed, TranscriptionInterrupted raised and the server
+        restarted in the background for the next clip."""
+        with self._lock:
+            self.ensure_running()
+            watchdog = _Watchdog(timeout, cancel, self.kill)
+            try:
+                text = self._inference_with_retry(wav_data, filename, watchdog)
+            except Exception:
+                watchdog.stop()
+                if watchdog.reason:
+                    threading.Thread(target=self.restart, daemon=True).start()
+                    watchdog.check()
+                raise
+        watchdog.finish()
+        return text
+
+    def _inference_with_retry(self, wav_data: bytes, filename: str, watchdog: _Watchdog) -> str:
+        try:
+            return self.inference(wav_data, filename)
+        except (urllib.error.URLError, ConnectionError) as e:
+            if watchdog.reason:
+                raise
+            try:
+                # Give a crashing process a moment to be reaped before deciding
+                self.process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                raise e
+            # The backend crashed mid-request: bring it back and retry once
+            logging.warning(f"Whisper server request failed ({str(e)}), restarting backend")
+            self.ensure_running()
+            return self.inference(wav_data, filename)
 
 class WhisperTranscriber:
-    def __init__(self, model_path: str = "models/ggml-base.en.bin"):
+    def __init__(self, model_path: str = "models/ggml-base.en.bin", backend: str = "cli",
+                 executable: Optional[Command] = None, server_executable: Optional[Command] = None,
+                 threads: int = 4, beam_size: Optional[int] = None, best_of: Optional[int] = None,
+                 server_port: int = 0, server_startup_timeout: float = 60.0,
+                 cache: Optional[TranscriptCache] = None, deadline_base: float = 0.0,
+                 deadline_ratio: float = 0.0):
+        # What copy() needs to build another transcriber for the same model and binaries
+        self.options = {
+            "model_path": model_path,
+            "backend": backend,
+            "executable": executable,
+            "server_executable": server_executable,
+            "server_port": server_port,
+            "server_startup_timeout": server_startup_timeout,
+            "deadline_base": deadline_base,
+            "deadline_ratio": deadline_ratio
+        }
         self.whisper_path = os.path.join(os.path.dirname(__file__), "whisper.cpp")
         self.model_path = os.path.join(self.whisper_path, model_path)
-        self.executable = os.path.join(self.whisper_path, "build", "bin", "Release", "whisper-cli.exe")
-        
-        if not os.path.exists(self.executable):
+        self.bin_path = os.path.join(self.whisper_path, "build", "bin", "Release")
+        self.executable = executable or os.path.join(self.bin_path, "whisper-cli.exe")
+        self.threads = threads
+        self.beam_size = beam_size
+        self.best_of = best_of
+        self.cache = cache
+        # A run is killed after deadline_base + deadline_ratio * audio seconds (0, 0: never)
+        self.deadline_base = deadline_base
+        self.deadline_ratio = deadline_ratio
+        self.server = None
+
+        if isinstance(self.executable, str) and not os.path.exists(self.executable):
             logging.error(f"Whisper executable not found at {self.executable}")
             raise FileNotFoundError(f"Whisper executable not found. Please compile whisper.cpp first.")
-            
+
         if not os.path.exists(self.model_path):
             logging.error(f"Model not found at {self.model_path}")
             raise FileNotFoundError(f"Model file not found at {self.model_path}")
-            
-    def transcribe(self, audio_path: str) -> Optional[str]:
-        try:
-            output_base = audio_path.rsplit(".", 1)[0]
-            
-            # Run whisper.cpp command with better parameters
-            cmd = [
-                self.executable,
-                "-m", self.model_path,
-                "-f", audio_path,
-                "-otxt",         # Output as text
-                "-pp",          # Print progress
-                "-l", "en",     # English language
-                "-t", "4",      # Use 4 threads
-                "--output-file", output_base  # Base name for output files
-            ]
-            
-            logging.info(f"Running Whisper command: {' '.join(cmd)}")
-            
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            # The output will be in a .txt file
-            txt_path = output_base + ".txt"
-            
-            if os.path.exists(txt_path):
-                with open(txt_path, "r", encoding="utf-8") as f:
-                    transcription = f.read().strip()
-                    
-                # Clean up the text file
-                try:
-                    os.remove(txt_path)
-                except Exception as e:
-                    logging.warning(f"Could not remove temporary file {txt_path}: {str(e)}")
-                    
-                return transcription
+
+        if backend == "server":
+            server_executable = server_executable or os.path.join(self.bin_path, "whisper-server.exe")
+            if isinstance(server_executable, str) and not os.path.exists(server_executable):
+                logging.warning(f"Whisper server not found at {server_executable}, falling back to whisper-cli")
             else:
-                logging.error("Transcription file not found after processing")
-                return None
-                
-        except subprocess.CalledProcessError as e:
-            logging.error(f"Error running Whisper: {str(e)}")
-            logging.error(f"Whisper stderr: {e.stderr}")
+                self.server = WhisperServer(
+                    server_executable,
+                    self.model_path,
+                    threads=threads,
+                    port=server_port,
+                    startup_timeout=server_startup_timeout
+                )
+                self.server.decode_params = self.decode_params()
+        elif backend != "cli":
+            raise ValueError(f"Unknown Whisper backend: {backend}")
+
+    @property
+    def backend(self) -> str:
+        return "server" if self.server else "cli"
+
+    def decode_params(self) -> dict:
+        """Decode settings that differ from whisper's defaults"""
+        params = {}
+        if self.beam_size is not None:
+            params["beam_size"] = self.beam_size
+        if self.best_of is not None:
+            params["best_of"] = self.best_of
+        return params
+
+    def configure(self, threads: Optional[int] = None, beam_size: Optional[int] = None,
+                  best_of: Optional[int] = None):
+        """Switch decode parameters, e.g. to a tuned configuration"""
+        if beam_size is not None:
+            self.beam_size = beam_size
+        if best_of is not None:
+            self.best_of = best_of
+        if self.server:
+            with self.server._lock:
+                self.server.decode_params = self.decode_params()
+                if threads is not None and threads != self.server.threads:
+                    # The thread count is fixed at server start; it restarts on the next clip
+                    self.server.threads = threads
+                    self.server.stop()
+        if threads is not None:
+            self.threads = threads
+
+    def copy(self, **overrides) -> "WhisperTranscriber":
+        """Another transcriber with this one's model and current settings, with
+        its own server; overrides replace constructor arguments"""
+        options = dict(self.options, threads=self.threads, beam_size=self.beam_size,
+                       best_of=self.best_of, cache=self.cache, server_port=0)
+        options.update(overrides)
+        return WhisperTranscriber(**options)
+
+    def warm_up(self):
+        """Start the resident backend ahead of the first clip"""
+        if self.server:
+            with self.server._lock:
+                self.server.ensure_running()
+
+    def close(self):
+        if self.server:
+            self.server.stop()
+
+    def deadline(self, audio_seconds: float) -> Optional[float]:
+        """Seconds a run on this much audio may take before it is killed"""
+        if not (self.deadline_base or self.deadline_ratio):
             return None
+        return self.deadline_base + self.deadline_ratio * audio_seconds
+
+    def transcribe(self, audio_path: str, timings: Optional[dict] = None,
+                   on_partial: Optional[PartialCallback] = None,
+                   cancel: Optional[threading.Event] = None) -> Optional[str]:
+        """Transcribe a WAV file on disk. Stage durations in seconds are added
+        to `timings` when a dict is passed; on_partial receives the text as
+        it is decoded (whisper-cli only). Raises TranscriptionInterrupted
+        when the run overruns its deadline or `cancel` is set."""
+        timeout = self.deadline(_wav_seconds(audio_path))
+        try:
+            with METRICS.span("whisper.transcribe"):
+                wav_data = None
+                if self.server or self.cache:
+                    with open(audio_path, "rb") as f:
+                        wav_data = f.read()
+                # The WAV header is part of the key, so it also covers the sample format
+                key, text = self._cache_lookup(wav_data, timings)
+                if text is not None:
+                    return text
+                if self.server:
+                    logging.info("Sending %s to Whisper server at %s", audio_path, self.server.url)
+                    text = self._run_server(wav_data, timings, os.path.basename(audio_path), timeout, cancel)
+                else:
+                    text = self._run_cli(["-f", audio_path], timings=timings, on_partial=on_partial,
+                                         timeout=timeout, cancel=cancel)
+                self._cache_store(key, text)
+                return text
+        except TranscriptionInterrupted:
+            raise
         except Exception as e:
             logging.error(f"Error during transcription: {str(e)}")
-            return None 
+            return None
+
+    def transcribe_pcm(self, pcm: bytes, rate: int = 16000, channels: int = 1,
+                       sample_width: int = 2, timings: Optional[dict] = None,
+                       on_partial: Optional[PartialCallback] = None,
+                       cancel: Optional[threading.Event] = None) -> Optional[str]:
+        """Transcribe raw PCM without touching disk: the audio goes to whisper
+        through stdin (or the server request body) and the text comes back on stdout"""
+        timeout = self.deadline(len(pcm) / (rate * channels * sample_width))
+        try:
+            with METRICS.span("whisper.transcribe"):
+                key, text = self._cache_lookup(pcm, timings, rate=rate, channels=channels,
+                                               sample_width=sample_width)
+                if text is not None:
+                    return text
+                start = time.perf_counter()
+                wav_data = pcm_to_wav(pcm, rate, channels, sample_width)
+                _add_timing(timings, "wav_encode", time.perf_counter() - start)
+                if self.server:
+                    logging.info("Sending %d bytes of audio to Whisper server at %s", len(pcm), self.server.url)
+                    text = self._run_server(wav_data, timings, timeout=timeout, cancel=cancel)
+                else:
+                    text = self._run_cli(["-f", "-"], wav_data, timings, on_partial, timeout, cancel)
+                self._cache_store(key, text)
+                return text
+        except TranscriptionInterrupted:
+            raise
+        except Exception as e:
+            logging.error(f"Error during transcription: {str(e)}")
+            return None
+
+    def _cache_lookup(self, audio, timings: Optional[dict],
+                      **audio_format) -> Tuple[Optional[str], Optional[str]]:
+        """(key, cached transcript or None); (None, None) without a cache"""
+        if not self.cache:
+            return None, None
+        start = time.perf_counter()
+        params = dict(self.decode_params(), language="en", **audio_format)
+        key = cache_key(audio, self.model_path, params)
+        text = self.cache.get(key)
+        _add_timing(timings, "cache", time.perf_counter() - start)
+        if text is not None:
+            logging.info("Transcript cache hit (%d hits, %d misses)", self.cache.hits, self.cache.misses)
+        return key, text
+
+    def _cache_store(self, key: Optional[str], text: Optional[str]):
+        if key is not None and text is not None:
+            self.cache.put(key, text)
+
+    def _run_server(self, wav_data: bytes, timings: Optional[dict], filename: str = "audio.wav",
+                    timeout: Optional[float] = None, cancel: Optional[threading.Event] = None) -> str:
+        start = time.perf_counter()
+        restarts = self.server.restarts
+        text = self.server.transcribe(wav_data, filename, timeout, cancel)
+        # The model is already loaded, so the request time is decode time
+        # (plus a model load if the backend had to be restarted)
+        key = "model_load" if self.server.restarts != restarts else "decode"
+        _add_timing(timings, key, time.perf_counter() - start)
+        return text
+
+    def _run_cli(self, input_args: List[str], input_data: Optional[bytes] = None,
+                 timings: Optional[dict] = None, on_partial: Optional[PartialCallback] = None,
+                 timeout: Optional[float] = None,
+                 cancel: Optional[threading.Event] = None) -> Optional[str]:
+        # Run whisper.cpp command with better parameters
+        cmd = _as_command(self.executable) + [
+            "-m", self.model_path,
+            *input_args,
+            "-nt",          # Plain text on stdout, no timestamps; logs go to stderr
+            "-pp",          # Progress percentages on stderr
+            "-l", "en",     # English language
+            "-t", str(self.threads)
+        ]
+        for name, value in self.decode_params().items():
+            cmd += ["--beam-size" if name == "beam_size" else "--best-of", str(value)]
+
+        logging.info("Running Whisper command: %s", " ".join(cmd))
+
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if input_data is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+        )
+        # A hung or pathologically slow run is killed; the next clip spawns a fresh one
+        watchdog = _Watchdog(timeout, cancel, process.kill)
+        stream = _CliStream(process, on_partial)
+        stream.start(input_data)
+        # whisper flushes stdout after every segment, so each read is new text
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        while True:
+            data = process.stdout.read1(65536)
+            if not data:
+                break
+            stream.add_text(decoder.decode(data))
+        stream.add_text(decoder.decode(b"", final=True))
+        process.wait()
+        stream.join()
+        watchdog.finish()
+        finished = time.perf_counter()
+        if stream.first_text_at is not None:
+            METRICS.record("whisper.first_segment", stream.first_text_at - start)
+
+        stderr = b"".join(stream.stderr)
+        if process.returncode != 0:
+            logging.error(f"Error running Whisper: exit code {process.returncode}")
+            logging.error(f"Whisper stderr: {stderr.decode('utf-8', errors='replace')}")
+            return None
+        text = stream.text.strip()
+        if timings is not None:
+            _add_cli_timings(timings, stderr, finished - start)
+            _add_timing(timings, "readback", time.perf_counter() - finished)
+        return text
+
+class _CliStream:
+    """Incremental output of one whisper-cli run: stdin is fed and stderr
+    drained on helper threads (so neither pipe can fill up and stall the
+    process), progress lines are picked out of stderr and every new piece
+    of text goes to on_partial along with the latest progress"""
+
+    def __init__(self, process: subprocess.Popen, on_partial: Optional[PartialCallback]):
+        self.process = process
+        self.on_partial = on_partial
+        self.text = ""
+        self.fraction = 0.0
+        self.stderr = []
+        self.first_text_at = None
+        self.threads = []
+
+    def start(self, input_data: Optional[bytes]):
+        if input_data is not None:
+            self.threads.append(threading.Thread(target=self._feed, args=(input_data,), daemon=True))
+        self.threads.append(threading.Thread(target=self._drain_stderr, daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def join(self):
+        for thread in self.threads:
+            thread.join()
+
+    def _feed(self, input_data: bytes):
+        try:
+            self.process.stdin.write(input_data)
+        except (BrokenPipeError, OSError):
+            # whisper exited early; its exit code and stderr tell why
+            pass
+        finally:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+
+    def _drain_stderr(self):
+        for line in self.process.stderr:
+            self.stderr.append(line)
+            match = _PROGRESS_LINE.search(line.decode("utf-8", errors="replace"))
+            if match:
+                self.fraction = min(1.0, int(match.group(1)) / 100)
+                self._notify()
+
+    def add_text(self, text: str):
+        if not text:
+            return
+        self.text += text
+        if self.first_text_at is None and self.text.strip():
+            self.first_text_at = time.perf_counter()
+        self._notify()
+
+    def _notify(self):
+        if self.on_partial:
+            try:
+                self.on_partial(self.text.strip(), self.fraction)
+            except Exception as e:
+                logging.error(f"Error in partial transcription callback: {str(e)}", exc_info=True)
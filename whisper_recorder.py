@@ -1,596 +1,227 @@
-import customtkinter as ctk
-import pyaudio
-import wave
-import threading
+"""Whisper Recorder entry point.
+
+    python whisper_recorder.py                 # the Tk window
+    python whisper_recorder.py --headless      # no window: Enter (or --hotkey [--hold]) toggles recording,
+                                               # "c" + Enter cancels transcriptions,
+                                               # transcripts are printed to stdout
+    python whisper_recorder.py --batch DIR_OR_FILE... [--workers N] [--output results.jsonl]
+    python whisper_recorder.py --export-recording ID OUT.wav | --compact-archive
+
+The GUI, hotkey and Win32 console modules are only imported by the mode that
+uses them, so the headless mode starts without them and runs on any OS.
+"""
 import time
+STARTED_AT = time.perf_counter()
+
 import os
-import logging
-import pyperclip
-import keyboard
-import ctypes
-from datetime import datetime
-from typing import Optional
-from whisper_cpp_wrapper import WhisperTranscriber
+import sys
+import queue
+import argparse
+import threading
+from settings import load_settings
+from app_logging import setup_logging, stop_logging
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('app.log'),
-        logging.StreamHandler()
-    ]
-)
+def run_gui(settings: dict):
+    from recorder_gui import WhisperRecorderApp
+    app = WhisperRecorderApp(settings, started_at=STARTED_AT)
+    app.run()
 
-# Windows API constants for console management
-SW_HIDE = 0
-SW_SHOW = 5
-KERNEL32 = ctypes.WinDLL('kernel32')
-USER32 = ctypes.WinDLL('user32')
+def report_progress(engine, message: str, fraction: float):
+    if fraction < 1.0:
+        print(message, file=sys.stderr, flush=True)
+        return
+    times = engine.startup_times
+    print(f"Ready: recording after {time.perf_counter() - STARTED_AT:.2f}s since launch "
+          f"(audio {times.get('ready', 0):.2f}s, whisper {times.get('whisper_ready', 0):.2f}s)",
+          file=sys.stderr, flush=True)
 
-class WhisperRecorderApp:
-    def __init__(self):
-        # Create necessary folders
-        self.recordings_dir = "recordings"
-        os.makedirs(self.recordings_dir, exist_ok=True)
-        
-        self.setup_window()
-        self.setup_audio()
-        self.setup_variables()
-        self.setup_whisper()
-        self.setup_hotkeys()
-        self.create_widgets()
-        self.load_history()
-        
-        # Hide console after initialization
-        self.window.after(1000, self.hide_console)
-        
-    def setup_window(self):
-        self.window = ctk.CTk()
-        self.window.title("Whisper Recorder")
-        self.window.geometry("800x900")
-        self.window.configure(fg_color="#1a1a1a")
-        ctk.set_appearance_mode("dark")
-        ctk.set_default_color_theme("blue")
-        
-        # Make window centered
-        screen_width = self.window.winfo_screenwidth()
-        screen_height = self.window.winfo_screenheight()
-        x = (screen_width - 800) // 2
-        y = (screen_height - 900) // 2
-        self.window.geometry(f"800x900+{x}+{y}")
-        
-        # Add window close handler
-        self.window.protocol("WM_DELETE_WINDOW", self.on_closing)
-        
-    def setup_audio(self):
-        self.chunk = 1024
-        self.format = pyaudio.paInt16
-        self.channels = 1
-        self.rate = 16000
-        self.max_duration = 60
-        self.p = pyaudio.PyAudio()
-        
-    def setup_variables(self):
-        self.recording = False
-        self.processing = False
-        self.stream = None
-        self.frames = []
-        self.auto_copy = ctk.BooleanVar(value=True)
-        self.show_console = ctk.BooleanVar(value=False)
-        self.current_recording_thread = None
-        self.transcriptions = []
-        self.start_time = None
-        self.hotkey_pressed = False
-        logging.debug("Variables initialized")
-        
-    def setup_whisper(self):
-        try:
-            self.transcriber = WhisperTranscriber()
-            logging.info("Whisper transcriber initialized successfully")
-        except Exception as e:
-            logging.error(f"Error initializing Whisper: {str(e)}", exc_info=True)
-            
-    def setup_hotkeys(self):
-        try:
-            keyboard.unhook_all()
-            keyboard.add_hotkey('ctrl+shift+c', self.toggle_recording, suppress=True)
-            logging.info("Hotkeys registered successfully")
-        except Exception as e:
-            logging.error(f"Error setting up hotkeys: {str(e)}", exc_info=True)
-            
-    def create_widgets(self):
-        # Top section with gradient
-        self.top_frame = ctk.CTkFrame(self.window, fg_color="transparent")
-        self.top_frame.pack(fill="x", padx=40, pady=(40, 20))
-        
-        # Title
-        title = ctk.CTkLabel(
-            self.top_frame,
-            text="Whisper Recorder",
-            font=("Segoe UI", 24, "bold"),
-            text_color="#ffffff"
-        )
-        title.pack(pady=(0, 20))
-        
-        # Subtitle
-        subtitle = ctk.CTkLabel(
-            self.top_frame,
-            text="Record and transcribe your voice with one click",
-            font=("Segoe UI", 14),
-            text_color="#888888"
-        )
-        subtitle.pack(pady=(0, 30))
-        
-        # Settings section with hotkey info and console toggle
-        settings_frame = ctk.CTkFrame(self.window, fg_color="#222222", corner_radius=15)
-        settings_frame.pack(fill="x", padx=40, pady=(0, 20))
-        
-        # Settings grid for better organization
-        settings_grid = ctk.CTkFrame(settings_frame, fg_color="transparent")
-        settings_grid.pack(fill="x", padx=15, pady=15)
-        
-        # Hotkey info
-        hotkey_label = ctk.CTkLabel(
-            settings_grid,
-            text="Press Ctrl+Shift+C to Start/Stop Recording",
-            font=("Segoe UI", 12, "bold"),
-            text_color="#ffffff"
-        )
-        hotkey_label.pack(side="left", padx=(0, 20))
-        
-        # Console toggle with icon-like symbol
-        self.console_toggle = ctk.CTkCheckBox(
-            settings_grid,
-            text="⌨ Show Console",
-            variable=self.show_console,
-            command=self.toggle_console,
-            font=("Segoe UI", 12),
-            fg_color="#4a9eff",
-            hover_color="#2d5a88",
-            corner_radius=4
-        )
-        self.console_toggle.pack(side="right")
-        
-        # Main recording section
-        self.record_frame = ctk.CTkFrame(self.window, fg_color="#222222", corner_radius=15)
-        self.record_frame.pack(fill="x", padx=40, pady=(0, 20))
-        
-        # Recording button with modern design
-        self.record_button = ctk.CTkButton(
-            self.record_frame,
-            text="Start Recording",
-            command=self.toggle_recording,
-            width=300,
-            height=60,
-            corner_radius=30,
-            font=("Segoe UI", 16, "bold"),
-            fg_color="#2d5a88",
-            hover_color="#1d3a58"
-        )
-        self.record_button.pack(pady=(30, 15))
-        
-        # Timer with modern font
-        self.timer_label = ctk.CTkLabel(
-            self.record_frame,
-            text="0:00",
-            font=("Segoe UI", 36, "bold"),
-            text_color="#4a9eff"
-        )
-        self.timer_label.pack(pady=(0, 10))
-        
-        # Progress bar with modern style
-        self.indicator = ctk.CTkProgressBar(
-            self.record_frame,
-            width=300,
-            height=4,
-            corner_radius=2,
-            fg_color="#333333",
-            progress_color="#4a9eff"
-        )
-        self.indicator.pack(pady=(0, 10))
-        self.indicator.set(0)
-        
-        # Status label with subtle color
-        self.status_label = ctk.CTkLabel(
-            self.record_frame,
-            text="",
-            font=("Segoe UI", 12),
-            text_color="#888888"
-        )
-        self.status_label.pack(pady=(0, 30))
-        
-        # Latest transcription section
-        latest_frame = ctk.CTkFrame(self.window, fg_color="#222222", corner_radius=15)
-        latest_frame.pack(fill="x", padx=40, pady=(0, 20))
-        
-        # Latest transcription header with settings
-        latest_header = ctk.CTkFrame(latest_frame, fg_color="transparent")
-        latest_header.pack(fill="x", padx=15, pady=(15, 0))
-        
-        latest_title = ctk.CTkLabel(
-            latest_header,
-            text="Latest Transcription",
-            font=("Segoe UI", 14, "bold"),
-            text_color="#ffffff"
-        )
-        latest_title.pack(side="left")
-        
-        # Auto-copy checkbox with modern style
-        self.auto_copy_check = ctk.CTkCheckBox(
-            latest_header,
-            text="Auto-copy to clipboard",
-            variable=self.auto_copy,
-            font=("Segoe UI", 12),
-            fg_color="#4a9eff",
-            hover_color="#2d5a88",
-            corner_radius=4
-        )
-        self.auto_copy_check.pack(side="right", padx=15)
-        
-        # Latest transcription text
-        self.latest_text = ctk.CTkTextbox(
-            latest_frame,
-            height=100,
-            font=("Segoe UI", 12),
-            fg_color="#2a2a2a",
-            text_color="#ffffff",
-            wrap="word"
-        )
-        self.latest_text.pack(fill="x", padx=15, pady=15)
-        
-        # History section with modern header
-        history_header = ctk.CTkFrame(self.window, fg_color="transparent")
-        history_header.pack(fill="x", padx=40, pady=(20, 10))
-        
-        history_title = ctk.CTkLabel(
-            history_header,
-            text="Transcription History",
-            font=("Segoe UI", 16, "bold"),
-            text_color="#ffffff"
-        )
-        history_title.pack(anchor="w")
-        
-        # Scrollable history with modern styling
-        self.transcription_frame = ctk.CTkScrollableFrame(
-            self.window,
-            fg_color="#222222",
-            corner_radius=15,
-            height=300
-        )
-        self.transcription_frame.pack(fill="both", expand=True, padx=40, pady=(0, 40))
-        
-    def toggle_recording(self):
-        try:
-            logging.debug(f"Toggle recording called. Current state - recording: {self.recording}, processing: {self.processing}")
-            if self.processing:
-                logging.debug("Ignoring toggle while processing")
-                return
-                
-            if not self.recording:
-                self.start_recording()
-            else:
-                self.stop_recording()
-        except Exception as e:
-            logging.error(f"Error in toggle_recording: {str(e)}", exc_info=True)
-            
-    def start_recording(self):
-        try:
-            if self.recording or self.processing:
-                logging.debug("Ignoring start_recording while already recording/processing")
-                return
-                
-            logging.debug("Starting recording")
-            self.recording = True
-            self.frames = []
-            self.start_time = time.time()
-            
-            if self.stream is not None:
-                try:
-                    logging.debug("Cleaning up existing stream")
-                    self.stream.stop_stream()
-                    self.stream.close()
-                except Exception as e:
-                    logging.error(f"Error cleaning up stream: {str(e)}", exc_info=True)
-                self.stream = None
-            
-            self.record_button.configure(
-                text="Stop Recording",
-                fg_color="#cc3333",
-                hover_color="#992222"
-            )
-            self.status_label.configure(text="Recording in progress...")
-            self.latest_text.delete("1.0", "end")
-            
-            logging.debug("Opening new audio stream")
-            self.stream = self.p.open(
-                format=self.format,
-                channels=self.channels,
-                rate=self.rate,
-                input=True,
-                frames_per_buffer=self.chunk
-            )
-            
-            logging.debug("Starting recording thread")
-            self.current_recording_thread = threading.Thread(target=self.record_audio)
-            self.current_recording_thread.start()
-            
-            self.update_timer()
-            logging.info("Started recording")
-        except Exception as e:
-            logging.error(f"Error in start_recording: {str(e)}", exc_info=True)
-            self.cleanup_recording()
-            
-    def cleanup_recording(self):
-        try:
-            logging.debug("Cleaning up recording state")
-            self.recording = False
-            self.start_time = None
-            if self.stream:
-                try:
-                    self.stream.stop_stream()
-                    self.stream.close()
-                except Exception as e:
-                    logging.error(f"Error closing stream during cleanup: {str(e)}", exc_info=True)
-                self.stream = None
-        except Exception as e:
-            logging.error(f"Error in cleanup_recording: {str(e)}", exc_info=True)
-            
-    def record_audio(self):
-        try:
-            logging.debug("Starting audio recording loop")
-            while self.recording and (time.time() - self.start_time) < self.max_duration:
-                try:
-                    data = self.stream.read(self.chunk, exception_on_overflow=False)
-                    self.frames.append(data)
-                except Exception as e:
-                    logging.error(f"Error reading audio data: {str(e)}", exc_info=True)
-                    break
-                    
-            logging.debug("Recording loop ended")
-            if (time.time() - self.start_time) >= self.max_duration:
-                logging.info("Max duration reached")
-                self.window.after(0, self.stop_recording)
-        except Exception as e:
-            logging.error(f"Error in record_audio thread: {str(e)}", exc_info=True)
-        finally:
-            if self.recording:
-                logging.debug("Forcing recording cleanup from thread")
-                self.window.after(0, self.cleanup_recording)
-                self.window.after(0, self.reset_ui)
-            
-    def stop_recording(self):
-        try:
-            if not self.recording:
-                logging.debug("Ignoring stop_recording while not recording")
-                return
-                
-            logging.debug("Stopping recording")
-            self.recording = False
-            self.processing = True
-            
-            self.record_button.configure(
-                text="Processing...",
-                state="disabled",
-                fg_color="#666666",
-                hover_color="#666666"
-            )
-            self.status_label.configure(text="Processing audio...")
-            
-            if self.stream:
-                try:
-                    self.stream.stop_stream()
-                    self.stream.close()
-                    self.stream = None
-                except Exception as e:
-                    logging.error(f"Error closing stream: {str(e)}", exc_info=True)
-            
-            logging.debug("Starting process_recording thread")
-            threading.Thread(target=self.process_recording).start()
-        except Exception as e:
-            logging.error(f"Error in stop_recording: {str(e)}", exc_info=True)
-            self.cleanup_recording()
-            self.reset_ui()
-            
-    def process_recording(self):
-        try:
-            logging.debug("Processing recording")
-            self.save_and_transcribe()
-        except Exception as e:
-            logging.error(f"Error in process_recording: {str(e)}", exc_info=True)
-        finally:
-            logging.debug("Resetting UI after processing")
-            self.window.after(0, self.reset_ui)
-            
-    def save_and_transcribe(self):
-        try:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = os.path.join(self.recordings_dir, f"recording_{timestamp}.wav")
-            txt_filename = os.path.join(self.recordings_dir, f"transcript_{timestamp}.txt")
-            
-            logging.debug(f"Saving WAV file: {filename}")
-            wf = wave.open(filename, 'wb')
-            wf.setnchannels(self.channels)
-            wf.setsampwidth(self.p.get_sample_size(self.format))
-            wf.setframerate(self.rate)
-            wf.writeframes(b''.join(self.frames))
-            wf.close()
-            
-            logging.debug("Starting transcription")
-            transcription = self.transcriber.transcribe(filename)
-            
-            if transcription:
-                logging.debug("Saving transcript")
-                with open(txt_filename, 'w', encoding='utf-8') as f:
-                    f.write(transcription)
-                
-                self.window.after(0, lambda: self.update_transcription(transcription))
-                logging.info(f"Successfully transcribed recording: {filename}")
-            else:
-                logging.error("Transcription failed or returned empty")
-                
+def report_cancelled(count: int):
+    print(f"Cancelling {count} transcription(s)" if count else "Nothing to cancel", file=sys.stderr, flush=True)
+
+def run_headless(settings: dict, hotkey: str = None, hold: bool = False):
+    from recorder_engine import RecorderEngine
+    from hotkeys import HotkeyDispatcher, HotkeyEvent, handle_hotkey
+
+    # Engine callbacks, hotkey and stdin events all run on this thread, in order
+    events = queue.SimpleQueue()
+    post = lambda action: events.put(HotkeyEvent(action, time.perf_counter()))
+    engine = RecorderEngine(
+        settings,
+        dispatch=events.put,
+        on_recording_changed=lambda recording: print(
+            "Recording..." if recording else "Stopped, transcribing...", file=sys.stderr, flush=True
+        ),
+        on_transcription=lambda text, stopped_at: print(text, flush=True),
+        # stdout only gets the full transcription
+        on_draft_transcription=lambda text, stopped_at: print(f"Draft: {text}", file=sys.stderr, flush=True),
+        on_transcription_failed=lambda job: print(
+            f"Transcription #{job.id + 1} {job.state}: {job.error or 'no result'}", file=sys.stderr, flush=True
+        ),
+        on_progress=lambda message, fraction: report_progress(engine, message, fraction)
+    )
+    engine.start()
+
+    hotkeys = None
+    if hotkey:
+        hotkeys = HotkeyDispatcher(
+            hotkey,
+            mode="hold" if hold else settings["hotkey_mode"],
+            cancel_hotkey=settings["cancel_hotkey"],
+            post=events.put
+        )
+        hotkeys.register()
+        action = "Hold" if hotkeys.mode == "hold" else "Press"
+        print(f"{action} {hotkey} to record, {settings['cancel_hotkey']} to cancel "
+              f"transcriptions, Ctrl+C to quit", file=sys.stderr)
+    else:
+        print("Press Enter to start/stop recording, c + Enter to cancel transcriptions, Ctrl+C to quit",
+              file=sys.stderr)
+
+    def read_stdin():
+        for line in sys.stdin:
+            post("cancel" if line.strip().lower() == "c" else "toggle")
+        if not hotkey:
+            events.put(None)
+
+    def handle(event):
+        if isinstance(event, HotkeyEvent):
+            handle_hotkey(engine, event, on_cancel=report_cancelled)
+        elif event is not None:
+            event()
+
+    threading.Thread(target=read_stdin, daemon=True).start()
+    try:
+        while True:
             try:
-                os.remove(filename)
-                logging.debug("Removed WAV file")
-            except Exception as e:
-                logging.warning(f"Could not remove temporary file {filename}: {str(e)}")
-                
-        except Exception as e:
-            logging.error(f"Error in save_and_transcribe: {str(e)}", exc_info=True)
-            
-    def update_transcription(self, text):
-        self.latest_text.delete("1.0", "end")
-        self.latest_text.insert("1.0", text)
-        
-        if self.auto_copy.get():
-            pyperclip.copy(text)
-            
-        self.add_transcription(text)
-        
-    def add_transcription(self, text, timestamp=None):
-        if timestamp is None:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        frame = ctk.CTkFrame(
-            self.transcription_frame,
-            fg_color="#2a2a2a",
-            corner_radius=10
-        )
-        # Pack at the beginning of the frame
-        frame.pack(fill="x", padx=10, pady=5, side="top")
-        
-        time_label = ctk.CTkLabel(
-            frame,
-            text=timestamp,
-            font=("Segoe UI", 10),
-            text_color="#666666"
-        )
-        time_label.pack(anchor="w", padx=15, pady=(10, 5))
-        
-        text_label = ctk.CTkLabel(
-            frame,
-            text=text,
-            font=("Segoe UI", 12),
-            text_color="#ffffff",
-            wraplength=680,
-            justify="left"
-        )
-        text_label.pack(padx=15, pady=(0, 10), anchor="w")
-        
-        copy_button = ctk.CTkButton(
-            frame,
-            text="Copy",
-            width=80,
-            height=28,
-            corner_radius=14,
-            font=("Segoe UI", 11),
-            fg_color="#333333",
-            hover_color="#444444",
-            command=lambda: self.copy_text(text)
-        )
-        copy_button.pack(anchor="e", padx=15, pady=(0, 10))
-        
-        # Add to transcriptions list at the beginning
-        self.transcriptions.insert(0, {"timestamp": timestamp, "text": text})
-        self.save_history()
-        
-    def copy_text(self, text):
-        pyperclip.copy(text)
-        
-    def load_history(self):
-        history_file = os.path.join(self.recordings_dir, "history.txt")
-        try:
-            if os.path.exists(history_file):
-                with open(history_file, "r", encoding="utf-8") as f:
-                    lines = f.readlines()
-                    # Process lines in chronological order (oldest to newest)
-                    for line in lines:
-                        timestamp, text = line.strip().split("|", 1)
-                        self.add_transcription(text, timestamp)
-                        
-                    # Set the latest transcription
-                    if lines:
-                        _, latest_text = lines[-1].strip().split("|", 1)
-                        self.latest_text.delete("1.0", "end")
-                        self.latest_text.insert("1.0", latest_text)
-        except Exception as e:
-            logging.error(f"Error loading history: {str(e)}")
-            
-    def save_history(self):
-        history_file = os.path.join(self.recordings_dir, "history.txt")
-        try:
-            with open(history_file, "w", encoding="utf-8") as f:
-                # Save in chronological order (oldest first)
-                for item in reversed(self.transcriptions):
-                    f.write(f"{item['timestamp']}|{item['text']}\n")
-        except Exception as e:
-            logging.error(f"Error saving history: {str(e)}")
-            
-    def reset_ui(self):
-        try:
-            logging.debug("Resetting UI")
-            self.processing = False
-            self.record_button.configure(
-                text="Start Recording",
-                state="normal",
-                fg_color="#2d5a88",
-                hover_color="#1d3a58"
-            )
-            self.status_label.configure(text="")
-            self.indicator.set(0)
-            self.timer_label.configure(text="0:00")
-        except Exception as e:
-            logging.error(f"Error in reset_ui: {str(e)}", exc_info=True)
-            
-    def on_closing(self):
-        try:
-            logging.debug("Application closing")
-            keyboard.unhook_all()
-            
-            if self.recording:
-                self.stop_recording()
-            if self.stream:
-                self.stream.stop_stream()
-                self.stream.close()
-            self.p.terminate()
-            logging.debug("Cleanup completed")
-            self.window.destroy()
-        except Exception as e:
-            logging.error(f"Error during application shutdown: {str(e)}", exc_info=True)
-            self.window.destroy()
-        
-    def update_timer(self):
-        if self.recording:
-            elapsed = int(time.time() - self.start_time)
-            remaining = self.max_duration - elapsed
-            if remaining >= 0:
-                self.timer_label.configure(text=f"{remaining // 60}:{remaining % 60:02d}")
-                self.indicator.set(elapsed / self.max_duration)
-                self.window.after(100, self.update_timer)
-            
-    def hide_console(self):
-        """Hide the console window"""
-        console_window = KERNEL32.GetConsoleWindow()
-        if console_window:
-            USER32.ShowWindow(console_window, SW_HIDE)
-            self.show_console.set(False)
-            
-    def show_console_window(self):
-        """Show the console window"""
-        console_window = KERNEL32.GetConsoleWindow()
-        if console_window:
-            USER32.ShowWindow(console_window, SW_SHOW)
-            
-    def toggle_console(self):
-        """Toggle console visibility based on checkbox state"""
-        if self.show_console.get():
-            self.show_console_window()
+                event = events.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if event is None:
+                # stdin closed, e.g. at the end of a piped session: transcribe what was recorded first
+                engine.stop_recording()
+                finish_transcriptions(engine, events, handle)
+                break
+            handle(event)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if hotkeys:
+            hotkeys.unregister()
+        engine.close()
+
+def finish_transcriptions(engine, events, handle):
+    """Keep running engine callbacks until every queued transcription is delivered"""
+    while True:
+        # Short waits, so Ctrl+C still gets through
+        delivered = engine.queue.wait(timeout=0.1)
+        while True:
+            try:
+                handle(events.get_nowait())
+            except queue.Empty:
+                break
+        if delivered:
+            return
+
+def run_batch(settings: dict, paths, output: str, workers: int, resume: bool):
+    from batch_transcriber import transcribe_batch
+    from transcript_cache import TranscriptCache
+
+    def report(record):
+        status = f"{record['audio_seconds']:.1f}s audio in {record['elapsed']:.1f}s" \
+            if record["text"] is not None else record["error"]
+        print(f"{record['file']}: {status}", file=sys.stderr, flush=True)
+
+    cache = None
+    if settings["transcript_cache"]:
+        os.makedirs("recordings", exist_ok=True)
+        cache = TranscriptCache(max_bytes=int(settings["transcript_cache_mb"] * 1024 * 1024))
+    try:
+        summary = transcribe_batch(
+            paths,
+            output,
+            workers=workers,
+            resume=resume,
+            transcriber_options={
+                "backend": settings["backend"],
+                "model_path": settings["whisper_model"],
+                "cache": cache,
+                "deadline_base": settings["transcription_deadline_base"],
+                "deadline_ratio": settings["transcription_deadline_ratio"]
+            },
+            on_result=report
+        )
+    except FileNotFoundError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    finally:
+        if cache:
+            stats = cache.stats()
+            print(f"Transcript cache: {stats['hits']} hits, {stats['misses']} misses", file=sys.stderr)
+            cache.close()
+    print(f"{summary['transcribed']} transcribed, {summary['failed']} failed, "
+          f"{summary['skipped']} already done; {summary['audio_seconds']:.0f}s of audio in "
+          f"{summary['wall_seconds']:.0f}s ({summary['realtime_factor']:.1f}x realtime)", file=sys.stderr)
+    return 1 if summary["failed"] else 0
+
+def run_archive_command(settings: dict, export, compact: bool):
+    from recording_archive import RecordingArchive
+    archive = RecordingArchive(
+        os.path.join("recordings", "archive"),
+        segment_bytes=int(settings["archive_segment_mb"] * 1024 * 1024)
+    )
+    try:
+        if export:
+            recording_id, path = export
+            archive.export_wav(int(recording_id), path)
+            print(f"Wrote recording {recording_id} to {path}", file=sys.stderr)
+        if compact:
+            reclaimed = archive.compact()
+            print(f"Reclaimed {reclaimed / 1024 / 1024:.1f} MB", file=sys.stderr)
+    except (KeyError, ValueError) as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    finally:
+        archive.close()
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and transcribe speech with whisper.cpp")
+    parser.add_argument("--headless", action="store_true", help="run without the window")
+    parser.add_argument("--hotkey", nargs="?", const="", metavar="KEYS",
+                        help="use a global hotkey in --headless mode (default: the \"hotkey\" setting)")
+    parser.add_argument("--hold", action="store_true", help="push-to-talk: record while --hotkey is held")
+    parser.add_argument("--batch", nargs="+", metavar="PATH", help="transcribe WAV files/directories and exit")
+    parser.add_argument("--output", default="transcripts.jsonl", help="JSONL results file for --batch")
+    parser.add_argument("--workers", type=int, default=0, help="parallel whisper processes for --batch (0: auto)")
+    parser.add_argument("--no-resume", action="store_true", help="redo files already in --output")
+    parser.add_argument("--export-recording", nargs=2, metavar=("ID", "WAV"),
+                        help="write a recording from the archive container to a WAV file")
+    parser.add_argument("--compact-archive", action="store_true",
+                        help="reclaim space of deleted recordings in the archive container")
+    parser.add_argument("--settings", default="settings.json", help="settings file")
+    args = parser.parse_args()
+
+    settings = load_settings(args.settings)
+    setup_logging(
+        settings["log_file"],
+        level=settings["log_level"],
+        max_bytes=settings["log_max_bytes"],
+        backup_count=settings["log_backup_count"],
+        # In headless mode stdout carries the transcripts and stderr the prompts
+        console=not (args.headless or args.batch or args.export_recording or args.compact_archive)
+    )
+    try:
+        if args.export_recording or args.compact_archive:
+            sys.exit(run_archive_command(settings, args.export_recording, args.compact_archive))
+        elif args.batch:
+            sys.exit(run_batch(settings, args.batch, args.output, args.workers, not args.no_resume))
+        elif args.headless:
+            hotkey = settings["hotkey"] if args.hotkey == "" else args.hotkey
+            run_headless(settings, hotkey, args.hold)
         else:
-            self.hide_console()
-        
-    def run(self):
-        self.window.mainloop()
+            run_gui(settings)
+    finally:
+        stop_logging()
 
 if __name__ == "__main__":
-    app = WhisperRecorderApp()
-    app.run() 
+    main()
@@ -0,0 +1,154 @@
+import os
+import re
+import json
+import time
+import platform
+import logging
+from typing import Dict, List, Optional
+from whisper_cpp_wrapper import TranscriptionInterrupted
+
+TUNING_FILE = "whisper_tuning.json"
+
+# (beam_size, best_of) from most to least thorough; the first is the reference
+DECODE_CANDIDATES = [(5, 5), (2, 2), (1, 1)]
+
+def machine_key(model_path: str) -> str:
+    """Identifies a machine/model pair so a cached tuning is only reused where it was measured"""
+    size = os.path.getsize(model_path) if os.path.exists(model_path) else 0
+    return "|".join([
+        platform.node(),
+        platform.machine(),
+        platform.processor() or "unknown",
+        str(os.cpu_count()),
+        os.path.basename(model_path),
+        str(size)
+    ])
+
+def thread_candidates(cpu_count: Optional[int] = None) -> List[int]:
+    cpu_count = cpu_count or os.cpu_count() or 4
+    candidates = {2, 4, 8, cpu_count // 2, cpu_count}
+    return sorted(t for t in candidates if 1 <= t <= cpu_count)
+
+def _words(text: str) -> List[str]:
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ref_word != hyp_word)
+            )
+        previous = current
+    return previous[-1] / len(ref)
+
+def load_cached(model_path: str, path: str = TUNING_FILE) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get(machine_key(model_path))
+    except Exception as e:
+        logging.error(f"Error reading tuning cache {path}: {str(e)}")
+        return None
+
+def save_cached(model_path: str, result: Dict, path: str = TUNING_FILE):
+    cache = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except Exception as e:
+            logging.warning(f"Replacing unreadable tuning cache {path}: {str(e)}")
+    cache[machine_key(model_path)] = result
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, indent=2)
+
+def calibrate(transcriber, clip_path: str, max_wer: float = 0.05, repeats: int = 2) -> Optional[Dict]:
+    """Time the calibration clip under each thread count and decode setting and
+    return the fastest configuration whose word error rate against the most
+    thorough setting stays within max_wer"""
+    threads = thread_candidates()
+    reference = None
+    measurements = []
+    for beam_size, best_of in DECODE_CANDIDATES:
+        for thread_count in threads:
+            transcriber.configure(threads=thread_count, beam_size=beam_size, best_of=best_of)
+            transcriber.warm_up()
+            best = None
+            text = None
+            for _ in range(repeats):
+                start = time.perf_counter()
+                try:
+                    text = transcriber.transcribe(clip_path)
+                except TranscriptionInterrupted:
+                    # Too slow to finish within the deadline: not a candidate
+                    text = None
+                elapsed = time.perf_counter() - start
+                if text is None:
+                    break
+                best = elapsed if best is None else min(best, elapsed)
+            if best is None:
+                logging.warning(f"Calibration run failed for threads={thread_count} beam={beam_size}")
+                continue
+            if reference is None:
+                reference = text
+            wer = word_error_rate(reference, text)
+            logging.info(f"Calibration threads={thread_count} beam={beam_size} best_of={best_of}: "
+                         f"{best:.2f}s, WER {wer:.3f}")
+            measurements.append({
+                "threads": thread_count,
+                "beam_size": beam_size,
+                "best_of": best_of,
+                "seconds": round(best, 4),
+                "wer": round(wer, 4)
+            })
+
+    accurate = [m for m in measurements if m["wer"] <= max_wer]
+    if not accurate:
+        logging.error("Calibration produced no usable configuration")
+        return None
+    fastest = min(accurate, key=lambda m: m["seconds"])
+    return {
+        "threads": fastest["threads"],
+        "beam_size": fastest["beam_size"],
+        "best_of": fastest["best_of"],
+        "max_wer": max_wer,
+        "measured_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "measurements": measurements
+    }
+
+def auto_tune(transcriber, clip_path: str, max_wer: float = 0.05,
+              path: str = TUNING_FILE) -> Optional[Dict]:
+    """Apply the cached tuning for this machine, calibrating once if there is none"""
+    tuning = load_cached(transcriber.model_path, path)
+    if tuning is None:
+        if not os.path.exists(clip_path):
+            logging.warning(f"Calibration clip not found at {clip_path}, skipping auto-tuning")
+            return None
+        logging.info(f"Calibrating whisper decode settings with {clip_path}")
+        # On a separate transcriber, so recordings made meanwhile keep the current settings
+        # and the cache and do not skew the timings. Repeats of the clip must really be
+        # decoded, not answered from the transcript cache.
+        calibrator = transcriber.copy(cache=None)
+        try:
+            tuning = calibrate(calibrator, clip_path, max_wer)
+        finally:
+            calibrator.close()
+        if tuning is None:
+            return None
+        save_cached(transcriber.model_path, tuning, path)
+    transcriber.configure(
+        threads=tuning["threads"],
+        beam_size=tuning["beam_size"],
+        best_of=tuning["best_of"]
+    )
+    logging.info(f"Using tuned decode settings: threads={tuning['threads']} "
+                 f"beam={tuning['beam_size']} best_of={tuning['best_of']}")
+    return tuning